@@ -1,9 +1,17 @@
 from flask import Flask
 from routes import bp
 from flask_cors import CORS
+import db
+import metrics
+import writes
 
 app = Flask(__name__)
+# FLASK_-prefixed environment variables override config, e.g. FLASK_WRITE_BATCHING=false.
+app.config.from_prefixed_env()
 CORS(app)
+db.init_app(app)
+metrics.init_app(app)
+writes.init_app(app)
 app.register_blueprint(bp)
 
 if __name__ == '__main__':
@@ -0,0 +1,157 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app as flask_app
+
+# One worker per pooled connection the requests can use; the write coalescer
+# holds one connection for good. Streamed (NDJSON) responses keep theirs until
+# the stream ends, so while streams are open a request can still wait on the
+# pool, up to DB_POOL_TIMEOUT before it gets a 503.
+EXECUTOR_WORKERS = flask_app.config['DB_POOL_SIZE']
+if 'write_coalescer' in flask_app.extensions:
+    EXECUTOR_WORKERS = max(1, EXECUTOR_WORKERS - 1)
+
+
+class AsgiApp:
+    """Serves the Flask blueprint on an asyncio event loop.
+
+    Connections, request bodies and response writes are handled on the loop;
+    each request's Flask/SQLite work runs on a bounded thread pool. Responses
+    come from the same view functions, so the HTTP contract is unchanged.
+    """
+
+    def __init__(self, wsgi_app, max_workers=EXECUTOR_WORKERS):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='api')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.extend(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+
+        loop = asyncio.get_running_loop()
+        environ = _build_environ(scope, bytes(body))
+        status, headers, chunks, rest = await loop.run_in_executor(self.executor, self._start, environ)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        if rest is None:
+            await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+            return
+
+        # Streamed responses (NDJSON) are pulled one chunk at a time so the
+        # event loop never buffers the whole body.
+        try:
+            for chunk in chunks:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            while True:
+                chunk = await loop.run_in_executor(self.executor, next, rest, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            await loop.run_in_executor(self.executor, _close, rest)
+
+    def _start(self, environ):
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                  for name, value in headers]
+            return lambda data: None
+
+        result = self.wsgi_app(environ, start_response)
+        iterator = iter(result)
+        # Most responses are a single chunk: finish them in this one executor
+        # hop and only fall back to per-chunk pulls for real streams.
+        chunks = []
+        for chunk in iterator:
+            chunks.append(chunk)
+            if len(chunks) == 2:
+                return started['status'], started['headers'], chunks, _Remaining(result, iterator)
+        _close(result)
+        return started['status'], started['headers'], chunks, None
+
+
+class _Remaining:
+    def __init__(self, result, iterator):
+        self.result = result
+        self.iterator = iterator
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.iterator)
+
+
+def _close(result):
+    if isinstance(result, _Remaining):
+        result = result.result
+    close = getattr(result, 'close', None)
+    if close is not None:
+        close()
+
+
+def _build_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+app = AsgiApp(flask_app)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='127.0.0.1', port=5000, log_level='warning')
@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATHS = ['/students?limit=50', '/students/search?name=Name12&limit=20']
+DEFAULT_CLIENTS = [100, 250, 500, 1000]
+
+SERVERS = {
+    # Flask's own threaded server, as app.py runs it but without the reloader.
+    'flask': "from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)",
+    'asgi': "import uvicorn, asgi; uvicorn.run(asgi.app, host='127.0.0.1', port={port}, "
+            "log_level='warning', backlog=2048)",
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, cwd=None):
+    env = dict(os.environ, PYTHONPATH=HERE + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    proc = subprocess.Popen([sys.executable, '-c', SERVERS[kind].format(port=port)], env=env,
+                            cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{kind} server did not start on port {port}")
+
+
+async def http_request(reader, writer, method, path, body=None):
+    head = f'{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+    if body is not None:
+        head += f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+    writer.write(head.encode('latin-1') + b'\r\n' + (body or b''))
+    await writer.drain()
+    raw = await reader.readuntil(b'\r\n\r\n')
+    lines = raw.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict(line.lower().split(': ', 1) for line in lines[1:] if ': ' in line)
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()
+    keep_alive = lines[0].startswith('HTTP/1.1') and headers.get('connection') != 'close'
+    return status, keep_alive
+
+
+async def _client(port, paths, offset, stop_at, latencies, errors):
+    conn = None
+    i = offset
+    while time.monotonic() < stop_at:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = await asyncio.open_connection('127.0.0.1', port)
+            status, keep_alive = await http_request(*conn, 'GET', path)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors.append(path)
+            if conn is not None:
+                conn[1].close()
+            conn = None
+            await asyncio.sleep(0.05)
+            continue
+        if status >= 400:
+            errors.append(path)
+        else:
+            latencies.append(time.perf_counter() - start)
+        if not keep_alive:
+            conn[1].close()
+            conn = None
+    if conn is not None:
+        conn[1].close()
+
+
+async def run_load(port, clients, duration, paths):
+    latencies = []
+    errors = []
+    stop_at = time.monotonic() + duration
+    started = time.monotonic()
+    await asyncio.gather(*(_client(port, paths, n, stop_at, latencies, errors) for n in range(clients)))
+    return latencies, errors, time.monotonic() - started
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Flask and ASGI servers under concurrent load")
+    parser.add_argument('--clients', type=int, nargs='+', default=DEFAULT_CLIENTS,
+                        help="concurrent client counts to test (default: 100 250 500 1000)")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per run (default: 10)")
+    parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['flask', 'asgi'])
+    parser.add_argument('--path', dest='paths', action='append',
+                        help="request path to cycle through; repeatable (default: a list and a search)")
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    print(f"{'server':<8}{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for kind in args.servers:
+        port = free_port()
+        proc = start_server(kind, port)
+        try:
+            for clients in args.clients:
+                latencies, errors, elapsed = asyncio.run(run_load(port, clients, args.duration, paths))
+                print(f"{kind:<8}{clients:>8}{len(latencies) / elapsed:>10.0f}"
+                      f"{percentile(latencies, 50) * 1000:>10.1f}{percentile(latencies, 99) * 1000:>10.1f}"
+                      f"{len(errors):>8}", flush=True)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == '__main__':
+    main()
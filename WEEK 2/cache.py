@@ -0,0 +1,107 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, Response
+
+from db import get_db_connection, get_table_version
+
+CACHE_SIZE = 256
+# Total bytes of cached bodies, and the largest single body worth caching.
+CACHE_BYTES = 32 * 1024 * 1024
+MAX_ENTRY_BYTES = 1024 * 1024
+CACHED_HEADERS = ('Link', 'X-Next-Cursor')
+
+
+class ResponseCache:
+    """LRU of serialized GET responses, keyed on URL and the students table version."""
+
+    def __init__(self, max_entries=CACHE_SIZE, max_bytes=CACHE_BYTES, max_entry_bytes=MAX_ENTRY_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1:]
+
+    def put(self, key, version, body, mimetype, headers):
+        if len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[key] = (version, body, mimetype, headers)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def cached(self, bypass=None):
+        # Answers If-None-Match with 304 and repeat reads from the LRU; only
+        # the single-row version lookup touches SQLite. Any write bumps the
+        # version, which changes the ETag and orphans the cached entries.
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if bypass is not None and bypass():
+                    return view(*args, **kwargs)
+                version = get_table_version(get_db_connection())
+                if version is None:
+                    return view(*args, **kwargs)
+                key = (request.path, tuple(sorted(request.args.items(multi=True))))
+                etag = _etag(key, version)
+
+                # A cache hit means this URL already produced a 200 at this
+                # version, so its arguments are valid; otherwise run the view
+                # first so bad arguments get their 400 rather than a 304.
+                entry = self.get(key, version)
+                if entry is not None:
+                    if request.if_none_match.contains(etag):
+                        return _not_modified(etag)
+                    body, mimetype, headers = entry
+                    response = Response(body, mimetype=mimetype, headers=headers)
+                else:
+                    response = view(*args, **kwargs)
+                    if not isinstance(response, Response) or response.status_code != 200:
+                        return response
+                    if not response.is_streamed:
+                        headers = [(name, value) for name, value in response.headers
+                                   if name in CACHED_HEADERS]
+                        self.put(key, version, response.get_data(), response.mimetype, headers)
+                    if request.if_none_match.contains(etag):
+                        response.close()
+                        return _not_modified(etag)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+            return wrapper
+        return decorator
+
+
+def _etag(key, version):
+    # The table version says whether anything changed; the URL digest keeps
+    # one page's tag from validating another page or query.
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+    return f'{version[0]}-{version[1]}-{digest}'
+
+
+def _not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
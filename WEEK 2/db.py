@@ -1,10 +1,261 @@
+import queue
 import sqlite3
+import threading
+import time
 
-def get_db_connection():
-    conn = sqlite3.connect('students.db')
+from flask import g, has_app_context, current_app, jsonify
+
+DATABASE = 'students.db'
+POOL_SIZE = 8
+POOL_TIMEOUT = 5.0
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 8192
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+def _connect(database=DATABASE):
+    conn = sqlite3.connect(database, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+    conn.execute('PRAGMA temp_store=MEMORY')
     return conn
 
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of tuned SQLite connections."""
+
+    def __init__(self, database=DATABASE, max_size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        # Set by metrics.init_app; times pool waits and statements when present.
+        self.observer = None
+        # journal_mode is stored in the database file, so it only needs setting once.
+        conn = _connect(database)
+        conn.execute('PRAGMA journal_mode=WAL')
+        self._created += 1
+        self._idle.put(conn)
+
+    def acquire(self):
+        if self.observer is None:
+            return self._acquire()
+        started = time.perf_counter()
+        conn = self._acquire()
+        self.observer.pool_wait(time.perf_counter() - started)
+        return conn
+
+    def _acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.max_size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    return _connect(self.database)
+                except sqlite3.Error:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise PoolTimeout(f"no database connection available after {self.timeout}s")
+        return self._check(conn)
+
+    def _check(self, conn):
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return conn
+        except sqlite3.Error:
+            self._discard(conn)
+            with self._lock:
+                self._created += 1
+            try:
+                return _connect(self.database)
+            except sqlite3.Error:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn):
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+class PooledConnection:
+    """Per-request handle; close() hands the connection back to the pool."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    @property
+    def closed(self):
+        return self._conn is None
+
+    def execute(self, sql, parameters=()):
+        observer = self._pool.observer
+        if observer is None:
+            return self._conn.execute(sql, parameters)
+        return observer.execute(self, self._conn, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        observer = self._pool.observer
+        if observer is None:
+            return self._conn.executemany(sql, seq_of_parameters)
+        return observer.executemany(self._conn, sql, seq_of_parameters)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+            if has_app_context() and g.get('db') is self:
+                g.pop('db')
+
+
+def init_app(app):
+    app.config.setdefault('DATABASE', DATABASE)
+    app.config.setdefault('DB_POOL_SIZE', POOL_SIZE)
+    app.config.setdefault('DB_POOL_TIMEOUT', POOL_TIMEOUT)
+    app.extensions['db_pool'] = ConnectionPool(app.config['DATABASE'],
+                                               app.config['DB_POOL_SIZE'],
+                                               app.config['DB_POOL_TIMEOUT'])
+    app.teardown_appcontext(release_db_connection)
+    app.register_error_handler(PoolTimeout, lambda e: (jsonify({'error': str(e)}), 503))
+
+
+def release_db_connection(exception=None):
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.close()
+
+
+def get_db_connection():
+    # Inside a request of an app set up with init_app, hand out one pooled
+    # connection per app context; it is returned at teardown even on errors.
+    if has_app_context() and 'db_pool' in current_app.extensions:
+        if 'db' not in g:
+            pool = current_app.extensions['db_pool']
+            g.db = PooledConnection(pool, pool.acquire())
+        return g.db
+    return _connect(current_app.config.get('DATABASE', DATABASE) if has_app_context() else DATABASE)
+
+
+def get_stream_connection():
+    # For streamed responses, which outlive the request's app context: the
+    # caller owns the connection and must close() it when the stream ends.
+    if has_app_context() and 'db_pool' in current_app.extensions:
+        pool = current_app.extensions['db_pool']
+        return PooledConnection(pool, pool.acquire())
+    return _connect(current_app.config.get('DATABASE', DATABASE) if has_app_context() else DATABASE)
+
+
+def create_search_index(conn):
+    # Grade filter index plus a trigram FTS5 index on name, kept in sync with
+    # the students table by triggers. Returns False when this SQLite build has
+    # no FTS5/trigram support; searches then fall back to LIKE.
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_students_grade ON students (grade)')
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'students_fts'").fetchone()
+    if not exists:
+        try:
+            conn.execute("""
+            CREATE VIRTUAL TABLE students_fts USING fts5(
+                name, content='students', content_rowid='roll_number', tokenize='trigram'
+            )
+            """)
+        except sqlite3.OperationalError:
+            return False
+        conn.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+    conn.executescript("""
+    CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN
+        INSERT INTO students_fts (rowid, name) VALUES (new.roll_number, new.name);
+    END;
+    CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN
+        INSERT INTO students_fts (students_fts, rowid, name) VALUES ('delete', old.roll_number, old.name);
+    END;
+    CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE OF roll_number, name ON students BEGIN
+        INSERT INTO students_fts (students_fts, rowid, name) VALUES ('delete', old.roll_number, old.name);
+        INSERT INTO students_fts (rowid, name) VALUES (new.roll_number, new.name);
+    END;
+    """)
+    return True
+
+
+def has_search_index(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'students_fts'").fetchone() is not None
+
+
+def create_version_table(conn):
+    # A random epoch plus a counter that every write route bumps inside its
+    # transaction; together they identify the table contents for ETags.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS students_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        epoch TEXT NOT NULL,
+        version INTEGER NOT NULL
+    )
+    """)
+    conn.execute("INSERT OR IGNORE INTO students_version (id, epoch, version) VALUES (1, lower(hex(randomblob(4))), 0)")
+
+
+def get_table_version(conn):
+    try:
+        row = conn.execute('SELECT epoch, version FROM students_version WHERE id = 1').fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return (row[0], row[1]) if row else None
+
+
+def bump_table_version(conn):
+    try:
+        conn.execute('UPDATE students_version SET version = version + 1 WHERE id = 1')
+    except sqlite3.OperationalError:
+        pass
+
+
 def initialize_db():
     conn = get_db_connection()
     conn.execute("""
@@ -14,5 +265,7 @@ def initialize_db():
         grade TEXT NOT NULL
     )
     """)
+    create_search_index(conn)
+    create_version_table(conn)
     conn.commit()
     conn.close()
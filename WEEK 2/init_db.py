@@ -1,4 +1,4 @@
-from db import get_db_connection
+from db import get_db_connection, create_search_index, create_version_table
 
 def initialize_db():
     conn = get_db_connection()
@@ -9,9 +9,11 @@ def initialize_db():
             grade TEXT NOT NULL
         )
     """)
+    create_search_index(conn)
+    create_version_table(conn)
     conn.commit()
     conn.close()
 
 if __name__ == "__main__":
     initialize_db()
-    print("students table created or already exists.")
+    print("students table and search index created or already exist.")
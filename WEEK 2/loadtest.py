@@ -0,0 +1,297 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import db
+from bench_asgi import SERVERS, free_port, http_request, percentile, start_server
+
+DEFAULT_ROWS = 100000
+DEFAULT_MIX = 'list=40,search=25,create=15,update=10,delete=8,bulk=2'
+BULK_SIZE = 50
+GRADES = 'ABCDEF'
+SYLLABLES = ['ka', 'ri', 'to', 'mo', 'lu', 'an', 'sa', 'vi', 'de', 'ro', 'shi', 'na', 'el', 'zu', 'pe', 'yo']
+# Status codes each operation returns when the API behaves correctly. update
+# and delete may race with each other on the same roll number, so 404 is fine.
+EXPECTED = {
+    'list': {200, 304},
+    'search': {200, 304},
+    'create': {201},
+    'update': {200, 404},
+    'delete': {200, 404},
+    'bulk': {200},
+}
+
+
+def random_name(rng):
+    return ' '.join(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+                    for _ in range(2))
+
+
+def seed_database(path, rows, seed=0):
+    # Reuses an existing file with the right row count, since seeding a large
+    # database (and its search index) dominates short runs. Runs never write
+    # to this file; each one gets a fresh copy.
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        try:
+            if conn.execute('SELECT COUNT(*) FROM students').fetchone()[0] == rows:
+                return False
+        except sqlite3.Error:
+            pass
+        finally:
+            conn.close()
+        os.remove(path)
+
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS students (
+        roll_number INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        grade TEXT NOT NULL
+    )
+    """)
+    rng = random.Random(seed)
+    conn.executemany('INSERT INTO students (roll_number, name, grade) VALUES (?, ?, ?)',
+                     ((n, random_name(rng), rng.choice(GRADES)) for n in range(1, rows + 1)))
+    # The search index is built from the loaded table in one pass.
+    db.create_search_index(conn)
+    db.create_version_table(conn)
+    conn.commit()
+    conn.close()
+    return True
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        op, _, weight = part.partition('=')
+        op = op.strip()
+        if op not in EXPECTED:
+            raise argparse.ArgumentTypeError(f"unknown operation '{op}' (choose from {', '.join(EXPECTED)})")
+        try:
+            mix[op] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight for '{op}': {weight!r}")
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("at least one operation needs a positive weight")
+    return mix
+
+
+class Workload:
+    """Builds requests for the mix; shared by all clients on one event loop."""
+
+    def __init__(self, rows, mix, seed=0):
+        self.rows = rows
+        self.ops = list(mix)
+        self.weights = [mix[op] for op in self.ops]
+        self.rng = random.Random(seed)
+        self.next_roll = rows + 1
+        self.created = []
+        self.search_terms = [random_name(self.rng).split()[0][:length]
+                             for length in (3, 4, 5, 6) for _ in range(25)]
+
+    def _new_roll(self):
+        roll = self.next_roll
+        self.next_roll += 1
+        return roll
+
+    def _existing_roll(self):
+        # Deletes mostly remove rows this run created, so the seeded table stays
+        # roughly the same size however long the test runs.
+        if self.created and self.rng.random() < 0.9:
+            return self.created.pop(self.rng.randrange(len(self.created)))
+        return self.rng.randint(1, self.rows)
+
+    def next_request(self):
+        op = self.rng.choices(self.ops, self.weights)[0]
+        rng = self.rng
+        if op == 'list':
+            after = rng.randint(0, self.rows)
+            return op, 'GET', f'/students?after={after}&limit={rng.choice((20, 50, 100))}', None
+        if op == 'search':
+            term = rng.choice(self.search_terms)
+            grade = f'&grade={rng.choice(GRADES)}' if rng.random() < 0.3 else ''
+            return op, 'GET', f'/students/search?name={term}{grade}&limit=50&sort=roll_number', None
+        if op == 'create':
+            roll = self._new_roll()
+            self.created.append(roll)
+            body = {'roll_number': roll, 'name': random_name(rng), 'grade': rng.choice(GRADES)}
+            return op, 'POST', '/students', json.dumps(body).encode()
+        if op == 'update':
+            roll = rng.randint(1, self.rows)
+            return op, 'PUT', f'/students/{roll}', json.dumps({'grade': rng.choice(GRADES)}).encode()
+        if op == 'delete':
+            return op, 'DELETE', f'/students/{self._existing_roll()}', None
+        items = []
+        for _ in range(BULK_SIZE):
+            roll = self._new_roll()
+            self.created.append(roll)
+            items.append({'op': 'insert', 'roll_number': roll, 'name': random_name(rng), 'grade': rng.choice(GRADES)})
+        return op, 'POST', '/students/bulk', json.dumps(items).encode()
+
+
+async def _client(port, workload, stop_at, samples, failures):
+    conn = None
+    while time.monotonic() < stop_at:
+        op, method, path, body = workload.next_request()
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = await asyncio.open_connection('127.0.0.1', port)
+            status, keep_alive = await http_request(*conn, method, path, body)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            failures.append((op, type(e).__name__))
+            if conn is not None:
+                conn[1].close()
+            conn = None
+            await asyncio.sleep(0.05)
+            continue
+        elapsed = time.perf_counter() - start
+        if status in EXPECTED[op]:
+            samples.setdefault(op, []).append(elapsed)
+        else:
+            failures.append((op, status))
+        if not keep_alive:
+            conn[1].close()
+            conn = None
+    if conn is not None:
+        conn[1].close()
+
+
+async def run_workload(port, workload, clients, duration):
+    samples = {}
+    failures = []
+    stop_at = time.monotonic() + duration
+    started = time.monotonic()
+    await asyncio.gather(*(_client(port, workload, stop_at, samples, failures) for _ in range(clients)))
+    return samples, failures, time.monotonic() - started
+
+
+def _stats(latencies, failures, elapsed):
+    return {
+        'requests': len(latencies),
+        'errors': failures,
+        'throughput': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+    }
+
+
+def summarize(samples, failures, elapsed):
+    endpoints = {}
+    for op in sorted(set(samples) | {op for op, _ in failures}):
+        op_failures = sum(1 for failed_op, _ in failures if failed_op == op)
+        endpoints[op] = _stats(samples.get(op, []), op_failures, elapsed)
+    all_latencies = [value for values in samples.values() for value in values]
+    return {'overall': _stats(all_latencies, len(failures), elapsed), 'endpoints': endpoints}
+
+
+def print_report(results):
+    print(f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = list(results['endpoints'].items()) + [('overall', results['overall'])]
+    for name, stats in rows:
+        latencies = [f"{stats[key]:>10.1f}" if stats[key] is not None else f"{'-':>10}"
+                     for key in ('p50_ms', 'p95_ms', 'p99_ms')]
+        print(f"{name:<10}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput']:>10.1f}" + ''.join(latencies))
+
+
+def compare(results, baseline, tolerance):
+    # A regression is lower throughput or higher p95/p99 than the baseline by
+    # more than the tolerance (a fraction, e.g. 0.1 for 10%).
+    regressions = []
+    old_endpoints = dict(baseline['endpoints'], overall=baseline['overall'])
+    new_endpoints = dict(results['endpoints'], overall=results['overall'])
+    for name, new in new_endpoints.items():
+        old = old_endpoints.get(name)
+        if not old:
+            continue
+        if old['throughput'] and new['throughput'] < old['throughput'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {old['throughput']} -> {new['throughput']} req/s")
+        for key in ('p95_ms', 'p99_ms'):
+            if old[key] and new[key] and new[key] > old[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {old[key]} -> {new[key]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the WEEK 2 student API with a mixed read/write workload")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help=f"students in the seeded database (default: {DEFAULT_ROWS})")
+    parser.add_argument('--db', help="seeded database to reuse or create (default: loadtest_<rows>_<seed>.db in a temp dir)")
+    parser.add_argument('--server', choices=sorted(SERVERS), default='flask', help="server to start (default: flask)")
+    parser.add_argument('--port', type=int, help="test an already running server on this port instead of starting one")
+    parser.add_argument('--clients', type=int, default=50, help="concurrent keep-alive clients (default: 50)")
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds to run (default: 20)")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for data and requests (default: 0)")
+    parser.add_argument('--output', default='loadtest_results.json', help="where to write results (default: loadtest_results.json)")
+    parser.add_argument('--baseline', help="earlier results file to compare against; exits 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="allowed regression as a fraction (default: 0.1)")
+    args = parser.parse_args()
+
+    proc = None
+    workdir = None
+    if args.port is None:
+        path = args.db or os.path.join(tempfile.gettempdir(), f'loadtest_{args.rows}_{args.seed}.db')
+        started = time.monotonic()
+        if seed_database(path, args.rows, args.seed):
+            print(f"Seeded {args.rows} students into {path} in {time.monotonic() - started:.1f}s")
+        # The servers open students.db relative to their working directory.
+        workdir = tempfile.mkdtemp(prefix='loadtest_')
+        shutil.copyfile(path, os.path.join(workdir, 'students.db'))
+        port = free_port()
+        proc = start_server(args.server, port, cwd=workdir)
+    else:
+        port = args.port
+
+    workload = Workload(args.rows, args.mix, args.seed)
+    try:
+        samples, failures, elapsed = asyncio.run(run_workload(port, workload, args.clients, args.duration))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = summarize(samples, failures, elapsed)
+    results['config'] = {
+        'server': args.server if args.port is None else f'port {args.port}',
+        'rows': args.rows,
+        'clients': args.clients,
+        'duration': args.duration,
+        'mix': args.mix,
+        'seed': args.seed,
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    print_report(results)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+from flask import g, has_app_context, request, Response
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+STATEMENT_LABEL_LENGTH = 120
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_label_value(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def statement_label(sql):
+    # One label per statement shape: whitespace collapsed and generated
+    # "IN (?, ?, ...)" lists folded, so label cardinality stays bounded.
+    sql = ' '.join(sql.split())
+    sql = re.sub(r'\?(\s*,\s*\?)+', '?, ...', sql)
+    return sql[:STATEMENT_LABEL_LENGTH]
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for label_values, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_number(bound)
+                labels = _format_labels(self.labels, label_values, [('le', le)])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {_format_number(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class TimedCursor:
+    """Cursor proxy that adds fetch time to the statement's execution time.
+
+    SQLite does most of a query's work while rows are stepped, so the
+    statement is recorded once the cursor is exhausted, closed or dropped.
+    """
+
+    def __init__(self, metrics, owner, conn, cursor, sql, parameters, elapsed):
+        self._metrics = metrics
+        self._owner = owner
+        self._conn = conn
+        self._cursor = cursor
+        self._sql = sql
+        self._parameters = parameters
+        self._elapsed = elapsed
+        self._rows = 0
+        self._finished = False
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = next(self._cursor)
+        except StopIteration:
+            self._elapsed += time.perf_counter() - started
+            self._finish()
+            raise
+        self._elapsed += time.perf_counter() - started
+        self._rows += 1
+        return row
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._elapsed += time.perf_counter() - started
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self._cursor.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(size)
+        self._elapsed += time.perf_counter() - started
+        self._rows += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._elapsed += time.perf_counter() - started
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __del__(self):
+        self._finish()
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        # The plan can only be read while the connection is still ours.
+        conn = None if self._owner.closed else self._conn
+        self._metrics.record_statement(conn, self._sql, self._parameters, self._elapsed, self._rows)
+
+
+class Metrics:
+    """Request, SQL and connection-pool metrics in Prometheus text format."""
+
+    def __init__(self, slow_query_ms=None):
+        self.slow_query_ms = slow_query_ms
+        self.request_duration = Histogram('api_request_duration_seconds', 'Request latency by route.',
+                                          ('method', 'route', 'status'))
+        self.request_sql = Histogram('api_request_sql_seconds', 'SQLite time spent per request, by route.',
+                                     ('method', 'route'))
+        self.sql_duration = Histogram('api_sql_duration_seconds', 'Execution time per SQL statement, fetches included.',
+                                      ('statement',))
+        self.sql_rows = Histogram('api_sql_rows', 'Rows returned per SQL statement.', ('statement',), ROW_BUCKETS)
+        self.pool_wait_seconds = Histogram('api_db_pool_wait_seconds', 'Time spent waiting for a pooled connection.')
+        self.slow_queries = Counter('api_slow_queries_total', 'Statements slower than SLOW_QUERY_MS.', ('statement',))
+
+    def pool_wait(self, seconds):
+        self.pool_wait_seconds.observe(seconds)
+
+    def execute(self, owner, conn, sql, parameters=()):
+        started = time.perf_counter()
+        cursor = conn.execute(sql, parameters)
+        return TimedCursor(self, owner, conn, cursor, sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, conn, sql, seq_of_parameters):
+        started = time.perf_counter()
+        cursor = conn.executemany(sql, seq_of_parameters)
+        self.record_statement(None, sql, None, time.perf_counter() - started, 0)
+        return cursor
+
+    def record_statement(self, conn, sql, parameters, elapsed, rows):
+        label = statement_label(sql)
+        self.sql_duration.observe(elapsed, label)
+        self.sql_rows.observe(rows, label)
+        if has_app_context():
+            g.metrics_sql_seconds = g.get('metrics_sql_seconds', 0.0) + elapsed
+        if self.slow_query_ms is not None and elapsed * 1000 >= self.slow_query_ms:
+            self.slow_queries.inc(label)
+            self._log_slow_query(conn, sql, parameters, elapsed, rows)
+
+    def _log_slow_query(self, conn, sql, parameters, elapsed, rows):
+        plan = None
+        if conn is not None and parameters is not None and sql.lstrip().upper().startswith(EXPLAINABLE):
+            try:
+                plan = conn.execute('EXPLAIN QUERY PLAN ' + sql, parameters).fetchall()
+            except sqlite3.Error:
+                pass
+        message = f"slow query ({elapsed * 1000:.1f} ms, {rows} rows): {' '.join(sql.split())}"
+        if parameters:
+            message += f" -- params {parameters!r}"
+        if plan:
+            message += ''.join(f"\n    {row[3]}" for row in plan)
+        logger.warning(message)
+
+    def render(self):
+        lines = []
+        for metric in (self.request_duration, self.request_sql, self.sql_duration, self.sql_rows,
+                       self.pool_wait_seconds, self.slow_queries):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _observe_request(metrics, status):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    route = _route()
+    metrics.request_duration.observe(time.perf_counter() - started, request.method, route, str(status))
+    metrics.request_sql.observe(g.get('metrics_sql_seconds', 0.0), request.method, route)
+
+
+def init_app(app):
+    # Call after db.init_app: statements are timed through the pool's observer.
+    app.config.setdefault('SLOW_QUERY_MS', None)
+    app.config.setdefault('SLOW_QUERY_LOG', None)
+    metrics = Metrics(app.config['SLOW_QUERY_MS'])
+    app.extensions['metrics'] = metrics
+    if 'db_pool' in app.extensions:
+        app.extensions['db_pool'].observer = metrics
+    if app.config['SLOW_QUERY_LOG']:
+        handler = logging.FileHandler(app.config['SLOW_QUERY_LOG'])
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        logger.addHandler(handler)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_seconds = 0.0
+
+    @app.after_request
+    def record_request(response):
+        _observe_request(metrics, response.status_code)
+        return response
+
+    @app.teardown_request
+    def record_failed_request(exception=None):
+        # after_request is skipped when a view raises; count those as 500s.
+        _observe_request(metrics, 500)
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    return metrics
@@ -1,31 +1,115 @@
-from flask import Blueprint, request, jsonify
-from db import get_db_connection
+from flask import Blueprint, request, jsonify, Response, url_for, current_app
+from db import get_db_connection, get_stream_connection, has_search_index, bump_table_version
+from cache import ResponseCache
+from writes import WriteTimeout, execute_write
+import json
 import sqlite3
 
 bp = Blueprint('routes', __name__)
+response_cache = ResponseCache()
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 1000
+MAX_BULK_ITEMS = 50000
+# SQLite stores integers as signed 64-bit.
+INT64_MIN, INT64_MAX = -2**63, 2**63 - 1
+BULK_OPS = ('insert', 'upsert', 'update', 'delete')
+BULK_SQL = {
+    'insert': 'INSERT INTO students (roll_number, name, grade) VALUES (?, ?, ?)',
+    'upsert': 'INSERT INTO students (roll_number, name, grade) VALUES (?, ?, ?) '
+              'ON CONFLICT(roll_number) DO UPDATE SET name = excluded.name, grade = excluded.grade',
+    'update': 'UPDATE students SET grade = ? WHERE roll_number = ?',
+    'delete': 'DELETE FROM students WHERE roll_number = ?',
+}
 
 @bp.route('/')
 def home():
     return jsonify({"message": "API is working"})
 
+def _int_arg(name, default=None):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    return int(value)
+
+def _stream_students(conn):
+    cursor = conn.execute('SELECT * FROM students ORDER BY roll_number')
+    try:
+        while True:
+            rows = cursor.fetchmany(STREAM_CHUNK_SIZE)
+            if not rows:
+                break
+            yield ''.join(json.dumps(dict(row), sort_keys=True) + '\n' for row in rows)
+    finally:
+        cursor.close()
+        conn.close()
+
+def _wants_ndjson():
+    return request.args.get('format') == 'ndjson' or \
+        request.accept_mimetypes.best == 'application/x-ndjson'
+
 @bp.route('/students', methods=['GET'])
+@response_cache.cached(bypass=_wants_ndjson)
 def get_students():
+    try:
+        after = _int_arg('after')
+        limit = _int_arg('limit')
+    except ValueError:
+        return jsonify({'error': 'after and limit must be integers'}), 400
+
+    if _wants_ndjson():
+        conn = get_stream_connection()
+        response = Response(_stream_students(conn), mimetype='application/x-ndjson')
+        # Also covers clients that disconnect before the first chunk.
+        response.call_on_close(conn.close)
+        return response
+
     conn = get_db_connection()
-    students = conn.execute('SELECT * FROM students').fetchall()
+    if after is None and limit is None:
+        students = conn.execute('SELECT * FROM students').fetchall()
+        conn.close()
+        return jsonify([dict(row) for row in students])
+
+    # Keyset pagination on the primary key: each page is an index seek.
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    students = conn.execute('SELECT * FROM students WHERE roll_number > ? ORDER BY roll_number LIMIT ?',
+                            (after if after is not None else -2**63, limit)).fetchall()
     conn.close()
-    return jsonify([dict(row) for row in students])
+    response = jsonify([dict(row) for row in students])
+    if len(students) == limit:
+        next_cursor = students[-1]['roll_number']
+        next_url = url_for('routes.get_students', after=next_cursor, limit=limit)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
+
+def _scalar_field_error(item, fields):
+    # Lists and objects cannot be bound as SQL parameters; reject them here so
+    # a bad request fails on its own instead of inside a shared write batch.
+    for field in fields:
+        if field in item and not isinstance(item[field], (str, int, float)):
+            return f'{field} must be a string or number'
+    return None
+
+def _roll_number_error(roll_number):
+    # Larger integers cannot be bound at all (OverflowError), so catch them
+    # before they are queued behind other writes.
+    if isinstance(roll_number, int) and not INT64_MIN <= roll_number <= INT64_MAX:
+        return 'roll_number is out of range'
+    return None
 
 @bp.route('/students', methods=['POST'])
 def add_student():
     data = request.get_json()
-    if not data.get('roll_number') or not data.get('name') or not data.get('grade'):
+    if not isinstance(data, dict) or not data.get('roll_number') or not data.get('name') or not data.get('grade'):
         return jsonify({'error': 'Missing data'}), 400
+    error = _scalar_field_error(data, ('roll_number', 'name', 'grade')) or _roll_number_error(data['roll_number'])
+    if error:
+        return jsonify({'error': error}), 400
     try:
-        conn = get_db_connection()
-        conn.execute('INSERT INTO students (roll_number, name, grade) VALUES (?, ?, ?)',
-                     (data['roll_number'], data['name'], data['grade']))
-        conn.commit()
-        conn.close()
+        execute_write('INSERT INTO students (roll_number, name, grade) VALUES (?, ?, ?)',
+                      (data['roll_number'], data['name'], data['grade']))
         return jsonify({'message': 'Student added successfully'}), 201
     except sqlite3.IntegrityError:
         return jsonify({'error': 'Student with that roll number already exists'}), 400
@@ -33,47 +117,206 @@ def add_student():
 @bp.route('/students/<int:roll_number>', methods=['PUT'])
 def update_student(roll_number):
     data = request.get_json()
-    if 'grade' not in data:
+    if not isinstance(data, dict) or 'grade' not in data:
         return jsonify({'error': 'Grade is required'}), 400
+    error = _scalar_field_error(data, ('grade',)) or _roll_number_error(roll_number)
+    if error:
+        return jsonify({'error': error}), 400
     try:
-        conn = get_db_connection()
-        cursor = conn.execute('UPDATE students SET grade = ? WHERE roll_number = ?',
-                              (data['grade'], roll_number))
-        conn.commit()
-        conn.close()
-        if cursor.rowcount == 0:
+        rowcount = execute_write('UPDATE students SET grade = ? WHERE roll_number = ?',
+                                 (data['grade'], roll_number))
+        if rowcount == 0:
             return jsonify({'error': 'Student not found'}), 404
         return jsonify({'message': 'Student grade updated successfully'}), 200
+    except WriteTimeout:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/students/<int:roll_number>', methods=['DELETE'])
 def delete_student(roll_number):
+    error = _roll_number_error(roll_number)
+    if error:
+        return jsonify({'error': error}), 400
     try:
-        conn = get_db_connection()
-        cursor = conn.execute('DELETE FROM students WHERE roll_number = ?', (roll_number,))
-        conn.commit()
-        conn.close()
-        if cursor.rowcount == 0:
+        rowcount = execute_write('DELETE FROM students WHERE roll_number = ?', (roll_number,))
+        if rowcount == 0:
             return jsonify({'error': 'Student not found'}), 404
         return jsonify({'message': 'Student deleted successfully'}), 200
+    except WriteTimeout:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _parse_bulk_items():
+    if request.mimetype == 'application/x-ndjson':
+        lines = request.get_data(as_text=True).splitlines()
+        return [json.loads(line) for line in lines if line.strip()]
+    items = request.get_json()
+    if not isinstance(items, list):
+        raise ValueError('expected a JSON array of operations')
+    return items
+
+def _validate_bulk_item(item):
+    if not isinstance(item, dict):
+        return 'Item must be an object'
+    if item.get('op') not in BULK_OPS:
+        return f"op must be one of {', '.join(BULK_OPS)}"
+    roll_number = item.get('roll_number')
+    if isinstance(roll_number, bool) or not isinstance(roll_number, int):
+        return 'roll_number must be an integer'
+    error = _roll_number_error(roll_number)
+    if error:
+        return error
+    if item['op'] in ('insert', 'upsert') and (not item.get('name') or not item.get('grade')):
+        return 'Missing data'
+    if item['op'] == 'update' and not item.get('grade'):
+        return 'Grade is required'
+    return _scalar_field_error(item, ('name', 'grade'))
+
+def _existing_roll_numbers(conn, roll_numbers):
+    found = set()
+    roll_numbers = list(roll_numbers)
+    for start in range(0, len(roll_numbers), 900):
+        chunk = roll_numbers[start:start + 900]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(f'SELECT roll_number FROM students WHERE roll_number IN ({placeholders})', chunk)
+        found.update(row[0] for row in rows)
+    return found
+
+def _apply_bulk_run(conn, op, run, results):
+    # `run` is a list of (index, item) with the same op. Existence is checked
+    # up front so every item gets its own result while the writes still go
+    # through a single executemany.
+    existing = _existing_roll_numbers(conn, {item['roll_number'] for _, item in run})
+    rows = []
+    for index, item in run:
+        roll_number = item['roll_number']
+        if op == 'insert':
+            if roll_number in existing:
+                results[index] = {'status': 400, 'error': 'Student with that roll number already exists'}
+                continue
+            existing.add(roll_number)
+            rows.append((roll_number, item['name'], item['grade']))
+            results[index] = {'status': 201, 'message': 'Student added successfully'}
+        elif op == 'upsert':
+            rows.append((roll_number, item['name'], item['grade']))
+            created = roll_number not in existing
+            existing.add(roll_number)
+            results[index] = {'status': 201 if created else 200,
+                              'message': 'Student added successfully' if created else 'Student updated successfully'}
+        elif roll_number not in existing:
+            results[index] = {'status': 404, 'error': 'Student not found'}
+        elif op == 'update':
+            rows.append((item['grade'], roll_number))
+            results[index] = {'status': 200, 'message': 'Student grade updated successfully'}
+        else:
+            existing.discard(roll_number)
+            rows.append((roll_number,))
+            results[index] = {'status': 200, 'message': 'Student deleted successfully'}
+    if rows:
+        conn.executemany(BULK_SQL[op], rows)
+        bump_table_version(conn)
+
+@bp.route('/students/bulk', methods=['POST'])
+def bulk_students():
+    try:
+        items = _parse_bulk_items()
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f'Invalid request body: {e}'}), 400
+    if len(items) > MAX_BULK_ITEMS:
+        return jsonify({'error': f'At most {MAX_BULK_ITEMS} operations per request'}), 413
+
+    results = [None] * len(items)
+    runs = []
+    for index, item in enumerate(items):
+        error = _validate_bulk_item(item)
+        if error:
+            results[index] = {'status': 400, 'error': error}
+            continue
+        if runs and runs[-1][0] == item['op']:
+            runs[-1][1].append((index, item))
+        else:
+            runs.append((item['op'], [(index, item)]))
+
+    # Consecutive operations of the same kind are applied together, in order,
+    # and the whole request commits or rolls back as one transaction. Taking
+    # the write lock first keeps the existence checks valid until the commit;
+    # otherwise a concurrent write could slip in between check and insert.
+    conn = get_db_connection()
+    try:
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            for op, run in runs:
+                _apply_bulk_run(conn, op, run, results)
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+    summary = {}
+    for index, result in enumerate(results):
+        result['index'] = index
+        outcome = 'ok' if result['status'] < 400 else 'failed'
+        summary[outcome] = summary.get(outcome, 0) + 1
+    return jsonify({'results': results, 'summary': summary}), 200
+
+def _search_index_available(conn):
+    available = current_app.extensions.get('students_fts')
+    if available is None:
+        available = has_search_index(conn)
+        current_app.extensions['students_fts'] = available
+    return available
+
+def _like_escape(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
 @bp.route('/students/search', methods=['GET'])
+@response_cache.cached()
 def search_students():
     name = request.args.get('name')
     grade = request.args.get('grade')
+    match = request.args.get('match', 'substring')
+    if match not in ('substring', 'prefix'):
+        return jsonify({'error': "match must be 'substring' or 'prefix'"}), 400
+    # Prefix matches gain little from relevance ranking and ranking scores
+    # every match, so they default to key order, where LIMIT can stop early.
+    sort = request.args.get('sort', 'roll_number' if match == 'prefix' else 'rank')
+    if sort not in ('rank', 'roll_number'):
+        return jsonify({'error': "sort must be 'rank' or 'roll_number'"}), 400
+    try:
+        limit = _int_arg('limit')
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
     conn = get_db_connection()
-    query = 'SELECT * FROM students WHERE 1=1'
     params = []
 
-    if name:
-        query += ' AND name LIKE ?'
-        params.append(f'%{name}%')
+    # The trigram index needs at least three characters; shorter names fall
+    # back to a LIKE scan.
+    if name and len(name) >= 3 and _search_index_available(conn):
+        query = ('SELECT students.* FROM students_fts '
+                 'JOIN students ON students.roll_number = students_fts.rowid '
+                 'WHERE students_fts MATCH ?')
+        params.append('"' + name.replace('"', '""') + '"')
+        if match == 'prefix':
+            query += " AND students.name LIKE ? ESCAPE '\\'"
+            params.append(_like_escape(name) + '%')
+        # Ranking has to score every match; sort=roll_number lets LIMIT stop early.
+        order = ' ORDER BY students_fts.rank' if sort == 'rank' else ' ORDER BY students_fts.rowid'
+    else:
+        query = 'SELECT * FROM students WHERE 1=1'
+        if name:
+            query += " AND name LIKE ? ESCAPE '\\'"
+            params.append(_like_escape(name) + '%' if match == 'prefix' else f'%{_like_escape(name)}%')
+        order = ' ORDER BY roll_number' if sort == 'roll_number' else ''
+
     if grade:
         query += ' AND grade = ?'
         params.append(grade)
+    query += order
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(max(0, limit))
 
     students = conn.execute(query, params).fetchall()
     conn.close()
@@ -0,0 +1,176 @@
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from flask import current_app, jsonify
+
+from db import PooledConnection, get_db_connection, bump_table_version
+
+WRITE_BATCH_SIZE = 256
+WRITE_BATCH_WINDOW_MS = 2
+WRITE_TIMEOUT = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+class WriteTimeout(Exception):
+    """A queued write was not confirmed in time; it may still be applied."""
+
+
+class WriteCoalescer:
+    """Applies single-row writes from concurrent requests in shared transactions.
+
+    A single writer thread drains the queue, runs every queued statement in
+    one BEGIN IMMEDIATE ... COMMIT, and hands each caller its own outcome.
+    Each statement runs inside its own savepoint, so an error in one (a
+    constraint violation, a bad parameter) only rolls back that statement and
+    is reported to that caller while the rest of the batch commits.
+    """
+
+    def __init__(self, pool, max_batch=WRITE_BATCH_SIZE, window_ms=WRITE_BATCH_WINDOW_MS, timeout=WRITE_TIMEOUT):
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self.timeout = timeout
+        self._conn = PooledConnection(pool, pool.acquire())
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='write-coalescer', daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, parameters=()):
+        # Blocks until the batch holding this write has committed; returns the
+        # statement's rowcount or raises its error. After `timeout` seconds it
+        # raises WriteTimeout instead; the outcome is then unknown, since the
+        # write stays queued and may still commit.
+        if self._closed:
+            raise RuntimeError('write coalescer is closed')
+        future = Future()
+        self._queue.put((sql, parameters, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise WriteTimeout(f'write not confirmed after {self.timeout}s; it may still be applied') from None
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+            self._conn.close()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        # Take everything already queued, then wait briefly for stragglers.
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            # Whatever goes wrong, every caller gets an answer and the thread
+            # keeps serving later writes.
+            try:
+                self._apply(batch)
+            except Exception as e:
+                logger.exception('write batch failed')
+                self._fail_pending(batch, e)
+
+    @staticmethod
+    def _fail_pending(batch, error):
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _apply(self, batch):
+        conn = self._conn
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            changed = False
+            for sql, parameters, future in batch:
+                conn.execute('SAVEPOINT write')
+                try:
+                    rowcount = conn.execute(sql, parameters).rowcount
+                except Exception as e:
+                    # sqlite3 errors, but also e.g. OverflowError for integers
+                    # SQLite cannot store.
+                    conn.execute('ROLLBACK TO write')
+                    conn.execute('RELEASE write')
+                    outcomes.append((future, None, e))
+                    continue
+                conn.execute('RELEASE write')
+                changed = changed or rowcount > 0
+                outcomes.append((future, rowcount, None))
+            if changed:
+                bump_table_version(conn)
+            conn.commit()
+        except Exception as e:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            self._fail_pending(batch, e)
+            return
+        for future, rowcount, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(rowcount)
+
+
+def init_app(app):
+    app.config.setdefault('WRITE_BATCHING', True)
+    app.config.setdefault('WRITE_BATCH_SIZE', WRITE_BATCH_SIZE)
+    app.config.setdefault('WRITE_BATCH_WINDOW_MS', WRITE_BATCH_WINDOW_MS)
+    app.config.setdefault('WRITE_TIMEOUT', WRITE_TIMEOUT)
+    app.register_error_handler(WriteTimeout, lambda e: (jsonify({'error': str(e)}), 503))
+    if not app.config['WRITE_BATCHING'] or 'db_pool' not in app.extensions:
+        return None
+    coalescer = WriteCoalescer(app.extensions['db_pool'],
+                               app.config['WRITE_BATCH_SIZE'],
+                               app.config['WRITE_BATCH_WINDOW_MS'],
+                               app.config['WRITE_TIMEOUT'])
+    app.extensions['write_coalescer'] = coalescer
+    atexit.register(coalescer.close)
+    return coalescer
+
+
+def execute_write(sql, parameters=()):
+    # Runs one write statement and commits it, bumping the table version when
+    # a row changed. Returns the rowcount; sqlite3 errors propagate.
+    coalescer = current_app.extensions.get('write_coalescer')
+    if coalescer is not None:
+        return coalescer.submit(sql, parameters)
+    conn = get_db_connection()
+    try:
+        rowcount = conn.execute(sql, parameters).rowcount
+        if rowcount:
+            bump_table_version(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    return rowcount
@@ -0,0 +1,182 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+# Columns are downcast block by block so large files never load in full.
+BLOCK_ROWS = 1_000_000
+
+
+def columns_dir(csv_path):
+    # students_clean.csv -> students_clean.columns/
+    return Path(csv_path).with_suffix(".columns")
+
+
+def _source_stamp(csv_path):
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _smallest_int(low, high):
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _float32_lossless(array):
+    for start in range(0, len(array), BLOCK_ROWS):
+        block = np.asarray(array[start:start + BLOCK_ROWS])
+        narrowed = block.astype(np.float32).astype(np.float64)
+        if not np.array_equal(narrowed, block, equal_nan=True):
+            return False
+    return True
+
+
+def _copy_as(source, target_path, dtype):
+    target = np.lib.format.open_memmap(target_path, mode="w+", dtype=dtype, shape=source.shape)
+    for start in range(0, len(source), BLOCK_ROWS):
+        target[start:start + BLOCK_ROWS] = source[start:start + BLOCK_ROWS]
+    target.flush()
+    del target
+
+
+class ColumnWriter:
+    """Writes DataFrame chunks to a directory of memory-mapped .npy columns.
+
+    Numbers are stored at full width while chunks arrive, then narrowed to the
+    smallest dtype that holds every value exactly (integers to int8/16/32,
+    floats to float32 only when no value changes). Text columns become
+    categorical codes. The directory is swapped in atomically on close().
+    """
+
+    def __init__(self, directory, rows):
+        self.directory = Path(directory)
+        self.tmp = self.directory.with_name(self.directory.name + ".tmp")
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        self.tmp.mkdir(parents=True)
+        self.rows = rows
+        self.offset = 0
+        self.columns = None
+        self.arrays = {}
+        self.categories = {}
+
+    def _open(self, chunk):
+        self.columns = list(chunk.columns)
+        for index, column in enumerate(self.columns):
+            values = chunk[column]
+            if pd.api.types.is_bool_dtype(values) or not pd.api.types.is_numeric_dtype(values):
+                self.categories[column] = {}
+                dtype = np.int32
+            else:
+                dtype = values.to_numpy().dtype
+            self.arrays[column] = np.lib.format.open_memmap(
+                self.tmp / f"{index}.raw.npy", mode="w+", dtype=dtype, shape=(self.rows,))
+
+    def append(self, chunk):
+        if self.columns is None:
+            self._open(chunk)
+        end = self.offset + len(chunk)
+        for column in self.columns:
+            values = chunk[column]
+            if column in self.categories:
+                lookup = self.categories[column]
+                uniques = values.dropna().unique()
+                for value in uniques:
+                    lookup.setdefault(value, len(lookup))
+                codes = values.map(lookup).fillna(-1).to_numpy(dtype=np.int32)
+                self.arrays[column][self.offset:end] = codes
+            else:
+                self.arrays[column][self.offset:end] = values.to_numpy()
+        self.offset = end
+
+    def close(self, source_csv):
+        if self.offset != self.rows:
+            raise ValueError(f"expected {self.rows} rows, got {self.offset}")
+        meta = {"rows": self.rows, "columns": [], "source": _source_stamp(source_csv)}
+        for index, column in enumerate(self.columns or []):
+            raw_path = self.tmp / f"{index}.raw.npy"
+            array = self.arrays.pop(column)
+            array.flush()
+            entry = {"name": column, "file": f"{index}.npy"}
+            if column in self.categories:
+                lookup = self.categories[column]
+                # Sorted categories, as pandas would infer them from the CSV.
+                ordered = sorted(lookup, key=str)
+                remap = np.empty(len(lookup) + 1, dtype=np.int64)
+                remap[[lookup[value] for value in ordered]] = np.arange(len(ordered))
+                remap[-1] = -1
+                dtype = _smallest_int(-1, max(len(ordered) - 1, 0))
+                target = np.lib.format.open_memmap(self.tmp / entry["file"], mode="w+", dtype=dtype, shape=array.shape)
+                for start in range(0, len(array), BLOCK_ROWS):
+                    target[start:start + BLOCK_ROWS] = remap[array[start:start + BLOCK_ROWS]]
+                target.flush()
+                del target
+                entry["categories"] = [value.item() if isinstance(value, np.generic) else value for value in ordered]
+            else:
+                dtype = array.dtype
+                if dtype.kind in "iu" and len(array):
+                    dtype = _smallest_int(int(array.min()), int(array.max()))
+                elif dtype == np.float64 and _float32_lossless(array):
+                    dtype = np.dtype(np.float32)
+                _copy_as(array, self.tmp / entry["file"], dtype)
+            del array
+            raw_path.unlink()
+            meta["columns"].append(entry)
+        with open(self.tmp / META_FILE, "w") as f:
+            json.dump(meta, f)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.replace(self.tmp, self.directory)
+
+
+def write_columns(df, csv_path):
+    writer = ColumnWriter(columns_dir(csv_path), len(df))
+    writer.append(df)
+    writer.close(csv_path)
+
+
+def read_columns(csv_path, columns=None):
+    # Returns None when there is no columnar copy or the CSV changed since it
+    # was written; numeric columns are memory-mapped, not read into memory.
+    directory = columns_dir(csv_path)
+    try:
+        with open(directory / META_FILE) as f:
+            meta = json.load(f)
+        if os.path.exists(csv_path) and meta["source"] != _source_stamp(csv_path):
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+
+    data = {}
+    for entry in meta["columns"]:
+        if columns is not None and entry["name"] not in columns:
+            continue
+        array = np.load(directory / entry["file"], mmap_mode="r")
+        if "categories" in entry:
+            data[entry["name"]] = pd.Categorical.from_codes(np.asarray(array), entry["categories"])
+        else:
+            data[entry["name"]] = array
+    return pd.DataFrame(data, copy=False)
+
+
+def load_students(csv_path, columns=None):
+    df = read_columns(csv_path, columns)
+    if df is not None:
+        return df, columns_dir(csv_path)
+    return pd.read_csv(csv_path, usecols=columns), Path(csv_path)
+
+
+def iter_chunks(csv_path, columns=None, chunksize=100_000):
+    # Fixed-size row chunks, from the memory-mapped columns when they are
+    # current (slices stay mapped) or from the CSV otherwise.
+    df = read_columns(csv_path, columns)
+    if df is not None:
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+        return
+    yield from pd.read_csv(csv_path, usecols=columns, chunksize=chunksize)
@@ -0,0 +1,200 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+STATE_FILE = ".pipeline_state.json"
+LOG_DIR = "pipeline_logs"
+HASH_BLOCK = 1 << 20
+
+
+@dataclass
+class Stage:
+    script: str
+    inputs: list
+    outputs: list
+    args: list = field(default_factory=list)
+
+
+# Inputs and outputs are paths relative to this directory; outputs may be
+# globs. A stage depends on whichever stage produces one of its inputs.
+STAGES = {
+    "clean": Stage("task1_cleaning.py",
+                   inputs=["students.csv", "task1_cleaning.py", "dataset.py"],
+                   outputs=["students_clean.csv", "students_clean.columns/meta.json"]),
+    "visuals": Stage("task2_visuals.py",
+                     inputs=["students_clean.csv", "task2_visuals.py", "dataset.py"],
+                     outputs=["figures/bar_avg_per_subject.png", "figures/pie_grade_distribution.png",
+                              "figures/hist_math_scores.png", "figures/line_trend_by_rank.png",
+                              "figures/scatter_math_vs_science.png", "figures/heatmap_correlation.png"]),
+    "regression": Stage("task3_regression.py",
+                        inputs=["students_clean.csv", "task3_regression.py", "dataset.py"],
+                        outputs=["linreg_model.joblib", "scaler.joblib", "figures/reg_actual_vs_predicted.png"]),
+    "classification": Stage("task4_classification.py",
+                            inputs=["students_clean.csv", "task4_classification.py", "dataset.py"],
+                            outputs=["figures/cm_*.png"]),
+}
+
+
+def dependencies(stages):
+    producers = {}
+    for name, stage in stages.items():
+        for output in stage.outputs:
+            producers[output] = name
+    return {name: sorted({producers[path] for path in stage.inputs if producers.get(path, name) != name})
+            for name, stage in stages.items()}
+
+
+def load_state(root):
+    try:
+        with open(root / STATE_FILE) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault("files", {})
+    state.setdefault("stages", {})
+    return state
+
+
+def save_state(root, state):
+    tmp = root / (STATE_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, root / STATE_FILE)
+
+
+def file_hash(root, path, file_cache):
+    # Content hash, reused while the file's size and mtime are unchanged.
+    full = root / path
+    try:
+        stat = full.stat()
+    except OSError:
+        return None
+    cached = file_cache.get(path)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(full, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    file_cache[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return file_cache[path][2]
+
+
+def stage_signature(root, stage, file_cache):
+    digest = hashlib.sha256(json.dumps([stage.script, stage.args]).encode())
+    for path in sorted(stage.inputs):
+        digest.update(f"{path}={file_hash(root, path, file_cache)};".encode())
+    return digest.hexdigest()
+
+
+def outputs_exist(root, stage):
+    return all(any(root.glob(pattern)) for pattern in stage.outputs)
+
+
+def run_stage(root, name, stage):
+    log_dir = root / LOG_DIR
+    log_dir.mkdir(exist_ok=True)
+    started = time.perf_counter()
+    with open(log_dir / f"{name}.log", "w") as log:
+        result = subprocess.run([sys.executable, stage.script, *stage.args], cwd=root,
+                                stdout=log, stderr=subprocess.STDOUT,
+                                env=dict(os.environ, MPLBACKEND="Agg"))
+    return result.returncode, time.perf_counter() - started
+
+
+def run_pipeline(root=HERE, targets=None, force=False, jobs=None, dry_run=False, stages=STAGES):
+    root = Path(root)
+    deps = dependencies(stages)
+    # Restrict to the requested stages plus everything upstream of them.
+    selected = set()
+    pending = list(targets or stages)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(deps[name])
+
+    state = load_state(root)
+    results = {}
+    timings = {}
+    signatures = {}
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs or len(selected)) as executor:
+        while len(results) < len(selected):
+            for name in stages:
+                if name not in selected or name in results or name in running.values():
+                    continue
+                if any(results.get(dep) is None for dep in deps[name]):
+                    continue
+                if any(results[dep] == "failed" or results[dep] == "blocked" for dep in deps[name]):
+                    results[name] = "blocked"
+                    print(f"[{name}] skipped: an upstream stage failed")
+                    continue
+                # Inputs are hashed only once upstream stages have finished.
+                signature = stage_signature(root, stages[name], state["files"])
+                up_to_date = state["stages"].get(name) == signature and outputs_exist(root, stages[name])
+                if up_to_date and not force:
+                    results[name] = "cached"
+                    print(f"[{name}] up to date")
+                    continue
+                if dry_run or any(results[dep] == "would run" for dep in deps[name]):
+                    results[name] = "would run"
+                    print(f"[{name}] would run")
+                    continue
+                print(f"[{name}] running {stages[name].script}")
+                future = executor.submit(run_stage, root, name, stages[name])
+                running[future] = name
+                state["stages"].pop(name, None)
+                signatures[name] = signature
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                returncode, elapsed = future.result()
+                timings[name] = elapsed
+                if returncode == 0:
+                    results[name] = "ran"
+                    state["stages"][name] = signatures[name]
+                    print(f"[{name}] done in {elapsed:.1f}s")
+                else:
+                    results[name] = "failed"
+                    print(f"[{name}] failed with exit code {returncode} after {elapsed:.1f}s; "
+                          f"see {LOG_DIR}/{name}.log")
+                save_state(root, state)
+    save_state(root, state)
+
+    print("\nStage            Result      Time")
+    for name in stages:
+        if name in selected:
+            elapsed = f"{timings[name]:.1f}s" if name in timings else "-"
+            print(f"{name:<16} {results[name]:<11} {elapsed}")
+    return all(result in ("ran", "cached", "would run") for result in results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the WEEK 3 pipeline, rerunning only stages whose inputs changed")
+    parser.add_argument("stages", nargs="*",
+                        help=f"stages to bring up to date, with their upstream stages: {', '.join(STAGES)} (default: all)")
+    parser.add_argument("--force", action="store_true", help="rerun the selected stages even if up to date")
+    parser.add_argument("--jobs", type=int, default=None, help="stages to run at once (default: all that are ready)")
+    parser.add_argument("--dry-run", action="store_true", help="show which stages would run without running them")
+    args = parser.parse_args()
+    unknown = [name for name in args.stages if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+    ok = run_pipeline(HERE, args.stages or None, args.force, args.jobs, args.dry_run)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
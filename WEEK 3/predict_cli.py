@@ -1,33 +1,178 @@
-import sys, json, joblib, pandas as pd
-
-# Load trained artifacts
-linreg = joblib.load("linreg_model.joblib")
-scaler = joblib.load("scaler.joblib")
-
-# Read JSON from stdin
-payload = json.loads(sys.stdin.read())
-
-# Figure out which features the scaler expects (scikit-learn >=1.0)
-expected = list(getattr(scaler, "feature_names_in_", []))
-if not expected:
-    # Fallback if feature names are unavailable; most likely you trained on hours_studied only
-    expected = ["hours_studied"]
-
-# Build input in the exact expected order; ignore any extra keys
-row = []
-missing = []
-for feat in expected:
-    val = payload.get(feat, None)
-    if val is None:
-        missing.append(feat)
-    row.append(val)
-
-if missing:
-    raise SystemExit(f"Missing required fields: {missing}. Please include them in the JSON.")
-
-X = pd.DataFrame([row], columns=expected)
-
-# Transform & predict
-X_s = scaler.transform(X)
-pred = linreg.predict(X_s)[0]
-print(round(float(pred), 2))
+import argparse, csv, itertools, json, math, sys
+import joblib, numpy as np, pandas as pd
+
+CHUNK_SIZE = 10_000
+
+
+def load_model():
+    # Load trained artifacts
+    linreg = joblib.load("linreg_model.joblib")
+    scaler = joblib.load("scaler.joblib")
+
+    # Figure out which features the scaler expects (scikit-learn >=1.0)
+    expected = list(getattr(scaler, "feature_names_in_", []))
+    if not expected:
+        # Fallback if feature names are unavailable; most likely you trained on hours_studied only
+        expected = ["hours_studied"]
+    return linreg, scaler, expected
+
+
+def predict_one(linreg, scaler, expected):
+    # Read JSON from stdin
+    payload = json.loads(sys.stdin.read())
+
+    # Build input in the exact expected order; ignore any extra keys
+    row = []
+    missing = []
+    for feat in expected:
+        val = payload.get(feat, None)
+        if val is None:
+            missing.append(feat)
+        row.append(val)
+
+    if missing:
+        raise SystemExit(f"Missing required fields: {missing}. Please include them in the JSON.")
+
+    X = pd.DataFrame([row], columns=expected)
+
+    # Transform & predict
+    X_s = scaler.transform(X)
+    pred = linreg.predict(X_s)[0]
+    print(round(float(pred), 2))
+
+
+def to_number(value):
+    if isinstance(value, bool):
+        raise ValueError
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError
+    return number
+
+
+def row_values(record, expected):
+    # Returns the feature values in the expected order, or an error message.
+    if not isinstance(record, dict):
+        return None, "expected a JSON object"
+    missing = [feat for feat in expected if record.get(feat) in (None, "")]
+    if missing:
+        return None, f"Missing required fields: {missing}"
+    values = []
+    bad = []
+    for feat in expected:
+        try:
+            values.append(to_number(record[feat]))
+        except (TypeError, ValueError):
+            bad.append(feat)
+    if bad:
+        return None, f"Non-numeric or non-finite fields: {bad}"
+    return values, None
+
+
+def read_ndjson(stream):
+    # (line number, record or None, parse error) for each non-blank line.
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except ValueError as e:
+            yield line_no, None, f"invalid JSON: {e}"
+
+
+def read_csv_rows(stream):
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [name.strip() for name in header]
+    for fields in reader:
+        if not fields:
+            continue
+        if len(fields) != len(header):
+            yield reader.line_num, None, f"expected {len(header)} fields, got {len(fields)}"
+            continue
+        yield reader.line_num, dict(zip(header, (field.strip() for field in fields))), None
+
+
+def detect_format(stream):
+    # Peek at the first non-blank line: NDJSON rows start with "{".
+    stream = iter(stream)
+    head = []
+    for line in stream:
+        head.append(line)
+        if line.strip():
+            break
+    fmt = "ndjson" if head and head[-1].lstrip().startswith("{") else "csv"
+    return fmt, itertools.chain(head, stream)
+
+
+def predict_batch(linreg, scaler, expected, stream=sys.stdin, out=sys.stdout, fmt="auto", chunksize=CHUNK_SIZE):
+    if fmt == "auto":
+        fmt, stream = detect_format(stream)
+    records = read_ndjson(stream) if fmt == "ndjson" else read_csv_rows(stream)
+
+    counts = {"ok": 0, "error": 0}
+
+    def flush(chunk):
+        # Predict every valid row of the chunk at once, then write all rows
+        # back in input order with errors in place.
+        valid = [values for _, values, _ in chunk if values is not None]
+        preds = iter(())
+        if valid:
+            X = pd.DataFrame(np.array(valid, dtype=float), columns=expected)
+            # Overflowing predictions become per-row errors below.
+            with np.errstate(over="ignore", invalid="ignore"):
+                preds = iter(linreg.predict(scaler.transform(X)))
+        lines = []
+        for line_no, values, error in chunk:
+            if values is None:
+                counts["error"] += 1
+                lines.append(json.dumps({"line": line_no, "error": error}))
+            else:
+                pred = float(next(preds))
+                if not math.isfinite(pred):
+                    counts["error"] += 1
+                    lines.append(json.dumps({"line": line_no, "error": "prediction is not finite"}))
+                    continue
+                counts["ok"] += 1
+                lines.append(json.dumps({"line": line_no, "predicted_average": round(pred, 2)}))
+        out.write("\n".join(lines) + "\n")
+        out.flush()
+
+    chunk = []
+    for line_no, record, error in records:
+        values = None
+        if error is None:
+            values, error = row_values(record, expected)
+        chunk.append((line_no, values, error))
+        if len(chunk) >= chunksize:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    print(f"Predicted {counts['ok']} row(s), {counts['error']} error(s)", file=sys.stderr)
+    return counts["error"] == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict a student's average score from JSON on stdin")
+    parser.add_argument("--batch", action="store_true",
+                        help="read many rows (NDJSON or CSV with a header) and write one JSON result per row, "
+                             "in input order; exits with status 1 if any row failed")
+    parser.add_argument("--format", choices=["auto", "ndjson", "csv"], default="auto",
+                        help="input format with --batch (default: detect from the first line)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE,
+                        help=f"rows predicted together with --batch (default: {CHUNK_SIZE})")
+    args = parser.parse_args()
+
+    linreg, scaler, expected = load_model()
+    if args.batch:
+        ok = predict_batch(linreg, scaler, expected, fmt=args.format, chunksize=args.chunksize)
+        sys.exit(0 if ok else 1)
+    predict_one(linreg, scaler, expected)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,272 @@
+import argparse
+
 import pandas as pd
 import numpy as np
 
-df = pd.read_csv("students.csv")
-print("\nHEAD:")
-print(df.head(10))
-print("\nINFO:")
-print(df.info())
-print("\nDESCRIBE (numeric):")
-print(df.describe())
+from dataset import ColumnWriter, columns_dir, write_columns
+
+INPUT_FILE = "students.csv"
+OUTPUT_FILE = "students_clean.csv"
+CHUNK_SIZE = 100_000
+MARK_COLUMNS = ["math", "science", "english"]
+GRADE_THRESHOLDS = [(85, "A"), (70, "B"), (55, "C"), (40, "D")]
+# Distinct values a sketch keeps before merging them into centroids; columns
+# with fewer distinct values (e.g. integer marks) get exact medians.
+DIGEST_COMPRESSION = 2000
+DIGEST_BUFFER = 5 * DIGEST_COMPRESSION
+# Distinct text values tracked per column when estimating modes.
+HEAVY_HITTERS = 10_000
+
+
+def to_grade(average):
+    average = np.asarray(average, dtype=float)
+    conditions = [average >= bound for bound, _ in GRADE_THRESHOLDS]
+    return np.select(conditions, [grade for _, grade in GRADE_THRESHOLDS], default="F")
+
+
+def add_derived_columns(df, derive_grade):
+    df["total"] = df[MARK_COLUMNS].sum(axis=1)
+    df["average"] = df[MARK_COLUMNS].mean(axis=1)
+    if derive_grade:
+        df["grade"] = to_grade(df["average"])
+    return df
+
+
+def clean(input_file=INPUT_FILE, output_file=OUTPUT_FILE, columnar=True):
+    df = pd.read_csv(input_file)
+    print("\nHEAD:")
+    print(df.head(10))
+    print("\nINFO:")
+    print(df.info())
+    print("\nDESCRIBE (numeric):")
+    print(df.describe())
+
+    num_cols = df.select_dtypes(include=[np.number]).columns
+    cat_cols = df.select_dtypes(exclude=[np.number]).columns
+
+    df[num_cols] = df[num_cols].fillna(df[num_cols].median())
+    for c in cat_cols:
+        df[c] = df[c].fillna(df[c].mode().iloc[0])
+
+    print("\nNULLS AFTER FILL:")
+    print(df.isna().sum())
+
+    add_derived_columns(df, derive_grade="grade" not in df.columns)
+
+    print("\nPREVIEW WITH DERIVED COLUMNS:")
+    print(df.head())
+
+    df.to_csv(output_file, index=False)
+    print(f"\nSaved -> {output_file}")
+    if columnar:
+        write_columns(df, output_file)
+        print(f"Saved -> {columns_dir(output_file)}/")
+
+
+class ValueCounts:
+    """Exact counts of each distinct value; gives the median and the mode."""
+
+    def __init__(self):
+        self.counts = pd.Series(dtype="int64")
+
+    def update(self, values):
+        self.counts = self.counts.add(values.value_counts(), fill_value=0).astype("int64")
+
+    def median(self):
+        counts = self.counts.sort_index()
+        total = counts.sum()
+        if total == 0:
+            return np.nan
+        cumulative = counts.cumsum().to_numpy()
+        values = counts.index.to_numpy(dtype=float)
+        lower = values[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+        upper = values[np.searchsorted(cumulative, total // 2 + 1)]
+        return (lower + upper) / 2
+
+    def mode(self):
+        # Same tie-break as Series.mode().iloc[0]: the smallest of the most common values.
+        if self.counts.empty:
+            return None
+        top = self.counts[self.counts == self.counts.max()]
+        return sorted(top.index)[0]
+
+
+class HeavyHitters:
+    """Misra-Gries summary: finds the mode in bounded memory.
+
+    Any value occurring in more than 1/capacity of the rows is kept, and the
+    most common value wins whenever it stands out from the rest.
+    """
+
+    def __init__(self, capacity=HEAVY_HITTERS):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+
+    def update(self, values):
+        counts = self.counts.add(values.value_counts(), fill_value=0).astype("int64")
+        if len(counts) > self.capacity:
+            cutoff = counts.nlargest(self.capacity + 1).iloc[-1]
+            counts = counts[counts > cutoff] - cutoff
+        self.counts = counts
+
+    mode = ValueCounts.mode
+
+
+class QuantileDigest:
+    """Merging t-digest: bounded-size centroids that estimate quantiles.
+
+    Values are kept exactly until there are more than DIGEST_BUFFER distinct
+    ones, so low-cardinality columns still get exact medians.
+    """
+
+    def __init__(self, compression=DIGEST_COMPRESSION, buffer=DIGEST_BUFFER):
+        self.compression = compression
+        self.buffer = buffer
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    def update(self, values):
+        values, counts = np.unique(values.to_numpy(dtype=float), return_counts=True)
+        self.means = np.concatenate([self.means, values])
+        self.weights = np.concatenate([self.weights, counts])
+        if len(self.means) > self.buffer:
+            self._compress()
+
+    def _merge_duplicates(self):
+        means, inverse = np.unique(self.means, return_inverse=True)
+        self.weights = np.bincount(inverse, weights=self.weights)
+        self.means = means
+
+    def _compress(self):
+        self._merge_duplicates()
+        if len(self.means) <= self.buffer:
+            return
+        # Group neighbours by the k1 scale function, which keeps centroids
+        # small near the tails and large around the median.
+        total = self.weights.sum()
+        q = (np.cumsum(self.weights) - self.weights) / total
+        k = self.compression * (np.arcsin(2 * q - 1) / np.pi + 0.5)
+        groups = np.floor(k).astype(int)
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        weights = np.add.reduceat(self.weights, starts)
+        self.means = np.add.reduceat(self.means * self.weights, starts) / weights
+        self.weights = weights
+
+    def median(self):
+        self._merge_duplicates()
+        total = self.weights.sum()
+        if total == 0:
+            return np.nan
+        cumulative = np.cumsum(self.weights)
+        if len(self.means) <= self.buffer and np.all(self.weights == np.round(self.weights)):
+            # Still exact: same rule as the in-memory median.
+            lower = self.means[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+            upper = self.means[np.searchsorted(cumulative, total // 2 + 1)]
+            return (lower + upper) / 2
+        centers = cumulative - self.weights / 2
+        return float(np.interp(total / 2, centers, self.means))
+
+
+def profile_columns(input_file, chunksize=CHUNK_SIZE, sketch=False):
+    # Pass 1: decide each column's type the way a whole-file read_csv would
+    # (numeric only if every value parses; float if any value is missing or
+    # fractional) and note which columns have missing values.
+    numeric = {}
+    needs_float = {}
+    missing = {}
+    rows = 0
+    for chunk in pd.read_csv(input_file, dtype=str, chunksize=chunksize):
+        rows += len(chunk)
+        for column in chunk.columns:
+            values = chunk[column]
+            n_missing = int(values.isna().sum())
+            missing[column] = missing.get(column, 0) + n_missing
+            if numeric.get(column, True):
+                parsed = pd.to_numeric(values, errors="coerce")
+                if parsed.isna().sum() == n_missing:
+                    numeric[column] = True
+                    needs_float[column] = needs_float.get(column, False) or parsed.dtype.kind == "f"
+                else:
+                    numeric[column] = False
+
+    # Fill values are only needed where something is missing, so medians and
+    # modes come from a read of just those columns.
+    stats = {}
+    gaps = [column for column in numeric if missing[column]]
+    if gaps:
+        for chunk in pd.read_csv(input_file, usecols=gaps, dtype=str, chunksize=chunksize):
+            for column in gaps:
+                values = chunk[column].dropna()
+                if column not in stats:
+                    if numeric[column]:
+                        stats[column] = QuantileDigest() if sketch else ValueCounts()
+                    else:
+                        stats[column] = HeavyHitters() if sketch else ValueCounts()
+                stats[column].update(pd.to_numeric(values) if numeric[column] else values)
 
-num_cols = df.select_dtypes(include=[np.number]).columns
-cat_cols = df.select_dtypes(exclude=[np.number]).columns
+    columns = {}
+    for column, is_numeric in numeric.items():
+        dtype = ("float64" if needs_float[column] else "int64") if is_numeric else str
+        fill = None
+        if column in stats:
+            fill = stats[column].median() if is_numeric else stats[column].mode()
+        columns[column] = (dtype, fill)
+    return columns, rows
 
-df[num_cols] = df[num_cols].fillna(df[num_cols].median())
-for c in cat_cols:
-    df[c] = df[c].fillna(df[c].mode().iloc[0])
 
-print("\nNULLS AFTER FILL:")
-print(df.isna().sum())
+def clean_streaming(input_file=INPUT_FILE, output_file=OUTPUT_FILE, chunksize=CHUNK_SIZE, sketch=False,
+                    columnar=True):
+    columns, rows = profile_columns(input_file, chunksize, sketch)
+    dtypes = {column: dtype for column, (dtype, _) in columns.items()}
+    fills = {column: fill for column, (_, fill) in columns.items() if fill is not None}
+    print(f"\nPass 1: {rows} rows, {len(columns)} columns")
+    for column, (dtype, fill) in columns.items():
+        kind = "median" if dtype != str else "mode"
+        fill_note = f"fill {kind} = {fill}" if column in fills else "nothing to fill"
+        print(f"  {column}: {'numeric' if dtype != str else 'text'}, {fill_note}")
 
-df["total"] = df[["math","science","english"]].sum(axis=1)
+    # Pass 2: fill, derive and append each chunk; only one chunk is in memory.
+    derive_grade = "grade" not in columns
+    filled = 0
+    writer = ColumnWriter(columns_dir(output_file), rows) if columnar else None
+    with open(output_file, "w", newline="") as out:
+        header = True
+        for chunk in pd.read_csv(input_file, dtype=dtypes, chunksize=chunksize):
+            filled += int(chunk.isna().sum().sum())
+            chunk = chunk.fillna(fills)
+            add_derived_columns(chunk, derive_grade)
+            chunk.to_csv(out, index=False, header=header)
+            header = False
+            if writer is not None:
+                writer.append(chunk)
+    print(f"Pass 2: filled {filled} missing values")
+    print(f"\nSaved -> {output_file}")
+    if writer is not None:
+        writer.close(output_file)
+        print(f"Saved -> {columns_dir(output_file)}/")
 
-df["average"] = df[["math","science","english"]].mean(axis=1)
 
-def to_grade(x):
-    if x >= 85: return "A"
-    if x >= 70: return "B"
-    if x >= 55: return "C"
-    if x >= 40: return "D"
-    return "F"
+def main():
+    parser = argparse.ArgumentParser(description="Clean students.csv and add total/average/grade columns")
+    parser.add_argument("--input", default=INPUT_FILE, help=f"CSV to clean (default: {INPUT_FILE})")
+    parser.add_argument("--output", default=OUTPUT_FILE, help=f"cleaned CSV to write (default: {OUTPUT_FILE})")
+    parser.add_argument("--stream", action="store_true",
+                        help="read fixed-size chunks instead of the whole file; memory is bounded by the chunk size "
+                             "plus, for columns with missing values, the distinct values counted for exact "
+                             "medians/modes (see --sketch)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE, help=f"rows per chunk with --stream (default: {CHUNK_SIZE})")
+    parser.add_argument("--sketch", action="store_true",
+                        help="with --stream, estimate medians with a t-digest and modes with a heavy-hitters summary "
+                             "instead of counting every distinct value, so memory stays bounded for any input size")
+    parser.add_argument("--no-columns", dest="columnar", action="store_false",
+                        help="skip the memory-mapped column copy that the analysis scripts load")
+    args = parser.parse_args()
 
-if "grade" not in df.columns:
-    df["grade"] = df["average"].apply(to_grade)
+    if args.stream:
+        clean_streaming(args.input, args.output, args.chunksize, args.sketch, args.columnar)
+    else:
+        clean(args.input, args.output, args.columnar)
 
-print("\nPREVIEW WITH DERIVED COLUMNS:")
-print(df.head())
 
-df.to_csv("students_clean.csv", index=False)
-print("\nSaved -> students_clean.csv")
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,263 @@
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-from pathlib import Path
+from matplotlib.colors import LogNorm
+
+from dataset import load_students
 
 CSV_PATH = "students_clean.csv"
 OUTDIR = Path("figures")
-OUTDIR.mkdir(exist_ok=True)
-
-df = pd.read_csv(CSV_PATH)
-
-if not {"total","average"}.issubset(df.columns):
-    df["total"] = df[["math","science","english"]].sum(axis=1)
-    df["average"] = df[["math","science","english"]].mean(axis=1)
-
-avg_per_subject = df[["math","science","english"]].mean()
-plt.figure()
-avg_per_subject.plot(kind="bar")
-plt.title("Average Scores per Subject")
-plt.ylabel("Average score")
-plt.tight_layout()
-plt.savefig(OUTDIR / "bar_avg_per_subject.png")
-plt.close()
-
-plt.figure()
-df["grade"].value_counts().plot(kind="pie", autopct="%1.1f%%")
-plt.title("Grade Distribution")
-plt.ylabel("")
-plt.tight_layout()
-plt.savefig(OUTDIR / "pie_grade_distribution.png")
-plt.close()
-
-plt.figure()
-df["math"].plot(kind="hist", bins=15)
-plt.title("Math Score Distribution")
-plt.xlabel("Math score")
-plt.tight_layout()
-plt.savefig(OUTDIR / "hist_math_scores.png")
-plt.close()
-
-if "rank" not in df.columns:
-    df = df.assign(rank=df["average"].rank(ascending=False, method="first").astype(int))
-
-trend = df.sort_values("rank")
-plt.figure()
-plt.plot(trend["rank"], trend["average"])
-plt.title("Performance Trend by Rank (1 = best)")
-plt.xlabel("Rank")
-plt.ylabel("Average score")
-plt.tight_layout()
-plt.savefig(OUTDIR / "line_trend_by_rank.png")
-plt.close()
-
-plt.figure()
-plt.scatter(df["math"], df["science"])
-plt.title("Math vs Science")
-plt.xlabel("Math")
-plt.ylabel("Science")
-plt.tight_layout()
-plt.savefig(OUTDIR / "scatter_math_vs_science.png")
-plt.close()
-
-num_cols = df.select_dtypes(include=[np.number])
-corr = num_cols.corr()
-
-plt.figure()
-plt.imshow(corr, interpolation="nearest")
-plt.title("Correlation Matrix")
-plt.xticks(range(len(num_cols.columns)), num_cols.columns, rotation=45, ha="right")
-plt.yticks(range(len(num_cols.columns)), num_cols.columns)
-plt.colorbar()
-plt.tight_layout()
-plt.savefig(OUTDIR / "heatmap_correlation.png")
-plt.close()
+CACHE_FILE = ".render_cache.json"
+# Bump to re-render every figure after changing how they are drawn.
+RENDER_VERSION = 1
+MARK_COLUMNS = ["math", "science", "english"]
+HIST_BINS = 15
+# Above these sizes, scatter plots become 2-D histograms and the rank trend
+# is drawn through evenly spaced ranks instead of every student.
+SCATTER_MAX_POINTS = 50_000
+SCATTER_BINS = 100
+TREND_MAX_POINTS = 5_000
+HASH_DROP_BITS = 8
+
+
+# Renderers run in worker processes and only receive small, pre-aggregated data.
+
+def render_bar(data, path):
+    plt.figure()
+    pd.Series(data["means"], index=data["subjects"]).plot(kind="bar")
+    plt.title("Average Scores per Subject")
+    plt.ylabel("Average score")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def render_pie(data, path):
+    plt.figure()
+    pd.Series(data["counts"], index=data["labels"]).plot(kind="pie", autopct="%1.1f%%")
+    plt.title("Grade Distribution")
+    plt.ylabel("")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def render_hist(data, path):
+    plt.figure()
+    edges = data["edges"]
+    plt.hist(edges[:-1], bins=edges, weights=data["counts"])
+    plt.title("Math Score Distribution")
+    plt.xlabel("Math score")
+    plt.ylabel("Frequency")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def render_trend(data, path):
+    plt.figure()
+    plt.plot(data["rank"], data["average"])
+    plt.title("Performance Trend by Rank (1 = best)")
+    plt.xlabel("Rank")
+    plt.ylabel("Average score")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def render_scatter(data, path):
+    plt.figure()
+    if "counts" in data:
+        counts = np.ma.masked_equal(data["counts"].T, 0)
+        # Log colours keep sparse regions visible next to dense ones.
+        plt.pcolormesh(data["xedges"], data["yedges"], counts, cmap="viridis", norm=LogNorm())
+        plt.colorbar(label="Students")
+    else:
+        plt.scatter(data["x"], data["y"])
+    plt.title("Math vs Science")
+    plt.xlabel("Math")
+    plt.ylabel("Science")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def render_heatmap(data, path):
+    columns = data["columns"]
+    plt.figure()
+    plt.imshow(data["corr"], interpolation="nearest")
+    plt.title("Correlation Matrix")
+    plt.xticks(range(len(columns)), columns, rotation=45, ha="right")
+    plt.yticks(range(len(columns)), columns)
+    plt.colorbar()
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+# Preparation runs in the main process over the full data and reduces each
+# figure to what its renderer draws.
+
+def prepare_bar(df):
+    means = df[MARK_COLUMNS].mean()
+    return {"subjects": list(means.index), "means": means.to_numpy()}
+
+
+def prepare_pie(df):
+    counts = df["grade"].value_counts()
+    counts = counts[counts > 0]
+    return {"labels": [str(label) for label in counts.index], "counts": counts.to_numpy()}
+
+
+def prepare_hist(df):
+    values = df["math"].to_numpy(dtype=float)
+    counts, edges = np.histogram(values[~np.isnan(values)], bins=HIST_BINS)
+    return {"counts": counts, "edges": edges}
+
+
+def prepare_trend(df):
+    if "rank" in df.columns:
+        trend = df[["rank", "average"]].sort_values("rank")
+        rank, average = trend["rank"].to_numpy(), trend["average"].to_numpy()
+    else:
+        # rank(ascending=False, method="first") puts the averages in
+        # descending order, so rank r holds the r-th largest average.
+        average = -np.sort(-df["average"].to_numpy(dtype=float))
+        rank = np.arange(1, len(average) + 1)
+    if len(rank) > TREND_MAX_POINTS:
+        keep = np.unique(np.linspace(0, len(rank) - 1, TREND_MAX_POINTS).round().astype(int))
+        rank, average = rank[keep], average[keep]
+    return {"rank": rank, "average": average}
+
+
+def prepare_scatter(df):
+    x = df["math"].to_numpy(dtype=float)
+    y = df["science"].to_numpy(dtype=float)
+    if len(x) <= SCATTER_MAX_POINTS:
+        return {"x": x, "y": y}
+    present = ~(np.isnan(x) | np.isnan(y))
+    counts, xedges, yedges = np.histogram2d(x[present], y[present], bins=SCATTER_BINS)
+    return {"counts": counts, "xedges": xedges, "yedges": yedges}
+
+
+def prepare_heatmap(df):
+    numeric = df.select_dtypes(include=[np.number])
+    if "rank" not in numeric.columns:
+        numeric = numeric.assign(rank=df["average"].rank(ascending=False, method="first").astype(int))
+    corr = numeric.corr()
+    return {"columns": list(corr.columns), "corr": corr.to_numpy()}
+
+
+# file name -> (input columns, parameters, prepare, render)
+FIGURES = {
+    "bar_avg_per_subject.png": (MARK_COLUMNS, {}, prepare_bar, render_bar),
+    "pie_grade_distribution.png": (["grade"], {}, prepare_pie, render_pie),
+    "hist_math_scores.png": (["math"], {"bins": HIST_BINS}, prepare_hist, render_hist),
+    "line_trend_by_rank.png": (["average", "rank"], {"max_points": TREND_MAX_POINTS}, prepare_trend, render_trend),
+    "scatter_math_vs_science.png": (["math", "science"], {"max_points": SCATTER_MAX_POINTS, "bins": SCATTER_BINS},
+                                    prepare_scatter, render_scatter),
+    "heatmap_correlation.png": (None, {"rank": True}, prepare_heatmap, render_heatmap),
+}
+
+
+def column_hash(series):
+    # Hash values, not storage, so the CSV and the columnar copy hash the same
+    # way. hash_pandas_object already treats categoricals like their values;
+    # numbers are widened to float64 (the copy narrows ints and lossless
+    # floats) and their last HASH_DROP_BITS mantissa bits dropped, since
+    # read_csv's default parser can be an ulp off the exactly stored value.
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        mantissa, exponent = np.frexp(series.to_numpy(dtype="float64"))
+        scale = 2.0 ** (53 - HASH_DROP_BITS)
+        series = pd.Series(np.ldexp(np.round(mantissa * scale) / scale, exponent))
+    hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()
+
+
+def figure_hash(df, columns, params, column_hashes):
+    if columns is None:
+        columns = list(df.select_dtypes(include=[np.number]).columns)
+    digest = hashlib.sha256(json.dumps({"version": RENDER_VERSION, "params": params}, sort_keys=True).encode())
+    for column in columns:
+        if column not in df.columns:
+            continue
+        if column not in column_hashes:
+            column_hashes[column] = column_hash(df[column])
+        digest.update(f"{column}={column_hashes[column]};".encode())
+    return digest.hexdigest()
+
+
+def load_render_cache(outdir):
+    try:
+        with open(outdir / CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_render_cache(outdir, cache):
+    tmp = outdir / (CACHE_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    tmp.replace(outdir / CACHE_FILE)
+
+
+def render_figures(csv_path=CSV_PATH, outdir=OUTDIR, workers=None, force=False):
+    outdir = Path(outdir)
+    outdir.mkdir(exist_ok=True)
+    df, source = load_students(csv_path)
+    print(f"Loaded: {source} ({len(df)} rows)")
+
+    if not {"total", "average"}.issubset(df.columns):
+        df["total"] = df[MARK_COLUMNS].sum(axis=1)
+        df["average"] = df[MARK_COLUMNS].mean(axis=1)
+
+    cache = load_render_cache(outdir)
+    column_hashes = {}
+    jobs = {}
+    for name, (columns, params, prepare, render) in FIGURES.items():
+        digest = figure_hash(df, columns, params, column_hashes)
+        path = outdir / name
+        if not force and cache.get(name) == digest and path.exists():
+            print(f"  {name}: unchanged, skipped")
+            continue
+        jobs[name] = (digest, render, prepare(df), path)
+
+    if jobs:
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {name: executor.submit(render, data, path) for name, (_, render, data, path) in jobs.items()}
+            for name, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"  {name}: failed ({e})")
+                    cache.pop(name, None)
+                    continue
+                cache[name] = jobs[name][0]
+                print(f"  {name}: rendered")
+        print(f"Rendered {len(jobs)} figure(s) in {time.perf_counter() - started:.2f}s")
+    save_render_cache(outdir, cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the student figures into figures/")
+    parser.add_argument("--csv", default=CSV_PATH, help=f"cleaned data (default: {CSV_PATH})")
+    parser.add_argument("--outdir", default=str(OUTDIR), help=f"figure directory (default: {OUTDIR})")
+    parser.add_argument("--workers", type=int, default=None, help="render processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="re-render figures even if their inputs are unchanged")
+    args = parser.parse_args()
+    render_figures(args.csv, args.outdir, args.workers, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import argparse
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -7,73 +9,241 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_error, mean_squared_error
+from sklearn.utils import check_random_state
 import joblib
 
+from dataset import iter_chunks, load_students
+
 CSV_PATH = "students_clean.csv"
 OUTDIR = Path("figures")
-OUTDIR.mkdir(exist_ok=True)
-
-df = pd.read_csv(CSV_PATH)
-
-if not {"average"}.issubset(df.columns):
-    df["total"] = df[["math","science","english"]].sum(axis=1)
-    df["average"] = df[["math","science","english"]].mean(axis=1)
-
-pref_feats = [c for c in ["hours_studied", "attendance", "participation"] if c in df.columns]
-if len(pref_feats) == 0:
-    if "hours_studied" not in df.columns:
-        raise ValueError("hours_studied column not found. Add it to your CSV for Task 3.")
-    pref_feats = ["hours_studied"]
-
-X = df[pref_feats].copy()
-y = df["average"].copy()
-
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-scaler = StandardScaler()
-X_train_s = scaler.fit_transform(X_train)
-X_test_s  = scaler.transform(X_test)
+MARK_COLUMNS = ["math", "science", "english"]
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+CHUNK_SIZE = 100_000
+# Points kept for the plots in --stream mode.
+PLOT_SAMPLE = 50_000
 
-linreg = LinearRegression()
-linreg.fit(X_train_s, y_train)
 
-y_pred = linreg.predict(X_test_s)
-mae = mean_absolute_error(y_test, y_pred)
-mse = mean_squared_error(y_test, y_pred)
-rmse = np.sqrt(mse)
+def choose_features(columns):
+    pref_feats = [c for c in ["hours_studied", "attendance", "participation"] if c in columns]
+    if len(pref_feats) == 0:
+        if "hours_studied" not in columns:
+            raise ValueError("hours_studied column not found. Add it to your CSV for Task 3.")
+        pref_feats = ["hours_studied"]
+    return pref_feats
 
-print("Features used:", pref_feats)
-print({"MAE": round(mae, 3), "MSE": round(mse, 3), "RMSE": round(rmse, 3)})
 
-plt.figure()
-plt.scatter(y_test, y_pred)
-plt.xlabel("Actual Average")
-plt.ylabel("Predicted Average")
-plt.title("Linear Regression: Actual vs Predicted")
-plt.tight_layout()
-plt.savefig(OUTDIR / "reg_actual_vs_predicted.png")
-plt.close()
+def with_average(df):
+    if not {"average"}.issubset(df.columns):
+        df = df.copy()
+        df["total"] = df[MARK_COLUMNS].sum(axis=1)
+        df["average"] = df[MARK_COLUMNS].mean(axis=1)
+    return df
 
-if X.shape[1] == 1:
-    x_col = pref_feats[0]
-    x_all = df[x_col].to_numpy().reshape(-1, 1)
-    x_min, x_max = x_all.min(), x_all.max()
-    grid = np.linspace(x_min, x_max, 100).reshape(-1, 1)
 
-    grid_s = (grid - scaler.mean_[0]) / scaler.scale_[0]
+def report(pref_feats, mae, mse):
+    rmse = np.sqrt(mse)
+    print("Features used:", pref_feats)
+    print({"MAE": round(mae, 3), "MSE": round(mse, 3), "RMSE": round(rmse, 3)})
 
-    y_line = linreg.predict(grid_s)
 
+def plot_results(scaler, linreg, pref_feats, x_range, train_x, train_y, test_y, test_pred):
+    OUTDIR.mkdir(exist_ok=True)
     plt.figure()
-    plt.scatter(X_train[x_col], y_train, alpha=0.7)
-    plt.plot(grid, y_line)
-    plt.xlabel(x_col.replace("_", " ").title())
-    plt.ylabel("Average")
-    plt.title(f"Regression Line: {x_col} vs Average")
+    plt.scatter(test_y, test_pred)
+    plt.xlabel("Actual Average")
+    plt.ylabel("Predicted Average")
+    plt.title("Linear Regression: Actual vs Predicted")
     plt.tight_layout()
-    plt.savefig(OUTDIR / "reg_line_single_feature.png")
+    plt.savefig(OUTDIR / "reg_actual_vs_predicted.png")
     plt.close()
 
-joblib.dump(linreg, "linreg_model.joblib")
-joblib.dump(scaler, "scaler.joblib")
-print("Saved linreg_model.joblib and scaler.joblib")
+    if len(pref_feats) == 1:
+        x_col = pref_feats[0]
+        x_min, x_max = x_range
+        grid = np.linspace(x_min, x_max, 100).reshape(-1, 1)
+
+        grid_s = (grid - scaler.mean_[0]) / scaler.scale_[0]
+
+        y_line = linreg.predict(grid_s)
+
+        plt.figure()
+        plt.scatter(train_x, train_y, alpha=0.7)
+        plt.plot(grid, y_line)
+        plt.xlabel(x_col.replace("_", " ").title())
+        plt.ylabel("Average")
+        plt.title(f"Regression Line: {x_col} vs Average")
+        plt.tight_layout()
+        plt.savefig(OUTDIR / "reg_line_single_feature.png")
+        plt.close()
+
+
+def save_artifacts(linreg, scaler):
+    joblib.dump(linreg, "linreg_model.joblib")
+    joblib.dump(scaler, "scaler.joblib")
+    print("Saved linreg_model.joblib and scaler.joblib")
+
+
+def train(csv_path=CSV_PATH):
+    df, _ = load_students(csv_path)
+    df = with_average(df)
+    pref_feats = choose_features(df.columns)
+
+    # Columns may be stored downcast (int8, float32); fit in float64 as before.
+    X = df[pref_feats].astype("float64")
+    y = df["average"].copy()
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+
+    scaler = StandardScaler()
+    X_train_s = scaler.fit_transform(X_train)
+    X_test_s  = scaler.transform(X_test)
+
+    linreg = LinearRegression()
+    linreg.fit(X_train_s, y_train)
+
+    y_pred = linreg.predict(X_test_s)
+    mae = mean_absolute_error(y_test, y_pred)
+    mse = mean_squared_error(y_test, y_pred)
+    report(pref_feats, mae, mse)
+
+    x_all = df[pref_feats[0]].to_numpy()
+    train_x = X_train[pref_feats[0]] if len(pref_feats) == 1 else None
+    plot_results(scaler, linreg, pref_feats, (x_all.min(), x_all.max()), train_x, y_train, y_test, y_pred)
+    save_artifacts(linreg, scaler)
+
+
+def test_rows(n_samples, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    # The rows train_test_split(test_size=..., random_state=...) puts in the
+    # test set: the first ceil(test_size * n) entries of its permutation.
+    n_test = int(np.ceil(test_size * n_samples))
+    permutation = check_random_state(random_state).permutation(n_samples)
+    mask = np.zeros(n_samples, dtype=bool)
+    mask[permutation[:n_test]] = True
+    return mask
+
+
+class CrossProducts:
+    """Running means and centered X'X / X'y, merged chunk by chunk (Chan et al.)."""
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.mean_x = np.zeros(n_features)
+        self.mean_y = np.float64(0.0)
+        self.xx = np.zeros((n_features, n_features))
+        self.xy = np.zeros(n_features)
+
+    def update(self, X, y):
+        count = len(X)
+        if count == 0:
+            return
+        mean_x = X.mean(axis=0)
+        mean_y = y.mean()
+        Xc = X - mean_x
+        yc = y - mean_y
+        total = self.n + count
+        dx = mean_x - self.mean_x
+        dy = mean_y - self.mean_y
+        weight = self.n * count / total
+        self.xx += Xc.T @ Xc + weight * np.outer(dx, dx)
+        self.xy += Xc.T @ yc + weight * dx * dy
+        self.mean_x += dx * count / total
+        self.mean_y += dy * count / total
+        self.n = total
+
+
+def solve_scaled(moments, scaler):
+    # LinearRegression on scaled features: center, then least squares. In
+    # scaled units the centered cross-products are X'X / (s s') and X'y / s.
+    scale = scaler.scale_
+    zz = moments.xx / np.outer(scale, scale)
+    zy = moments.xy / scale
+    coef, _, rank, _ = np.linalg.lstsq(zz, zy, rcond=None)
+    offset = (moments.mean_x - scaler.mean_) / scale
+    linreg = LinearRegression()
+    linreg.coef_ = coef
+    linreg.intercept_ = moments.mean_y - offset @ coef
+    linreg.n_features_in_ = len(coef)
+    linreg.rank_ = int(rank)
+    # Singular values of the centered, scaled training matrix.
+    linreg.singular_ = np.sqrt(np.clip(np.linalg.eigvalsh(zz)[::-1], 0, None))
+    return linreg
+
+
+def train_streaming(csv_path=CSV_PATH, chunksize=CHUNK_SIZE):
+    columns = list(pd.read_csv(csv_path, nrows=0).columns)
+    pref_feats = choose_features(columns)
+    needed = pref_feats + (["average"] if "average" in columns else MARK_COLUMNS)
+
+    n_samples = sum(len(chunk) for chunk in iter_chunks(csv_path, needed[:1], chunksize))
+    is_test = test_rows(n_samples)
+
+    # Pass 1: scaler statistics and cross-products over the training rows.
+    scaler = StandardScaler()
+    moments = CrossProducts(len(pref_feats))
+    x_min, x_max = np.inf, -np.inf
+    train_x, train_y = [], []
+    sampled = 0
+    offset = 0
+    for chunk in iter_chunks(csv_path, needed, chunksize):
+        chunk = with_average(chunk)
+        X = chunk[pref_feats].astype("float64")
+        y = chunk["average"].to_numpy(dtype=float)
+        train = ~is_test[offset:offset + len(chunk)]
+        offset += len(chunk)
+        x_min = min(x_min, X[pref_feats[0]].min())
+        x_max = max(x_max, X[pref_feats[0]].max())
+        if train.any():
+            scaler.partial_fit(X[train])
+            moments.update(X.to_numpy()[train], y[train])
+            if sampled < PLOT_SAMPLE:
+                take = np.flatnonzero(train)[:PLOT_SAMPLE - sampled]
+                train_x.append(X[pref_feats[0]].to_numpy()[take])
+                train_y.append(y[take])
+                sampled += len(take)
+    linreg = solve_scaled(moments, scaler)
+
+    # Pass 2: evaluate on the test rows.
+    abs_error = 0.0
+    sq_error = 0.0
+    n_test = 0
+    test_y, test_pred = [], []
+    offset = 0
+    for chunk in iter_chunks(csv_path, needed, chunksize):
+        chunk = with_average(chunk)
+        test = is_test[offset:offset + len(chunk)]
+        offset += len(chunk)
+        if not test.any():
+            continue
+        X = chunk[pref_feats].astype("float64")[test]
+        y = chunk["average"].to_numpy(dtype=float)[test]
+        pred = linreg.predict(scaler.transform(X))
+        abs_error += np.abs(y - pred).sum()
+        sq_error += ((y - pred) ** 2).sum()
+        n_test += len(y)
+        if sum(len(part) for part in test_y) < PLOT_SAMPLE:
+            test_y.append(y)
+            test_pred.append(pred)
+    report(pref_feats, float(abs_error / n_test), float(sq_error / n_test))
+
+    train_x = np.concatenate(train_x) if len(pref_feats) == 1 else None
+    plot_results(scaler, linreg, pref_feats, (x_min, x_max), train_x, np.concatenate(train_y),
+                 np.concatenate(test_y)[:PLOT_SAMPLE], np.concatenate(test_pred)[:PLOT_SAMPLE])
+    save_artifacts(linreg, scaler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit a linear regression of average score on study features")
+    parser.add_argument("--csv", default=CSV_PATH, help=f"cleaned data (default: {CSV_PATH})")
+    parser.add_argument("--stream", action="store_true",
+                        help="train from fixed-size chunks; memory depends on --chunksize, not the row count")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE, help=f"rows per chunk with --stream (default: {CHUNK_SIZE})")
+    args = parser.parse_args()
+    if args.stream:
+        train_streaming(args.csv, args.chunksize)
+    else:
+        train(args.csv)
+
+
+if __name__ == "__main__":
+    main()
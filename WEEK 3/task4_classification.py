@@ -1,90 +1,79 @@
 #!/usr/bin/env python3
 
 from __future__ import annotations
+import argparse
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import KFold, StratifiedKFold, train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
 
+from dataset import load_students
+
 CLEAN_CSV = Path("students_clean.csv")
 RAW_CSV   = Path("students.csv")
 OUTDIR    = Path("figures")
-OUTDIR.mkdir(exist_ok=True)
-
-if CLEAN_CSV.exists():
-    df = pd.read_csv(CLEAN_CSV)
-    print(f"Loaded: {CLEAN_CSV}")
-elif RAW_CSV.exists():
-    df = pd.read_csv(RAW_CSV)
-    print(f"Loaded: {RAW_CSV}")
-else:
-    sys.exit("❌ Neither students_clean.csv nor students.csv found in current folder.")
-
-if df["pass_fail"].dtype == object:
-    df["pass_fail"] = (
-        df["pass_fail"].astype(str).str.strip().str.lower().map({"pass": 1, "fail": 0})
-    )
-
-df = df.dropna(subset=["pass_fail"]).copy()
-df["pass_fail"] = df["pass_fail"].astype(int)
-
-candidates = ["math", "science", "english", "hours_studied", "attendance", "participation"]
-features = [c for c in candidates if c in df.columns]
-if not features:
-    sys.exit("❌ No usable feature columns. Expected at least one of: " + ", ".join(candidates))
-
-X = df[features].copy()
-y = df["pass_fail"].copy()
-
-X = X.fillna(X.median(numeric_only=True))
-
-unique_classes = sorted(y.unique().tolist())
-if len(unique_classes) < 2:
-    print("⚠️ Only one class present in target. Classification metrics may be trivial.")
-    stratify_arg = None
-else:
+CV_FOLDS = 5
+RANDOM_STATE = 42
+
+# name -> (estimator, fixed arguments, tuned parameter, grid, needs scaled features)
+CV_MODELS = {
+    "Logistic Regression": (LogisticRegression, {"max_iter": 1000}, "C", [0.01, 0.1, 1.0, 10.0], True),
+    "Decision Tree": (DecisionTreeClassifier, {"random_state": RANDOM_STATE}, "max_depth", [3, 5, 8, None], False),
+    "k-NN": (KNeighborsClassifier, {}, "n_neighbors", [3, 5, 7, 11, 15], True),
+}
+
+
+def load_data() -> tuple[pd.DataFrame, pd.Series, list[str]]:
+    if CLEAN_CSV.exists():
+        df, source = load_students(CLEAN_CSV)
+        print(f"Loaded: {source}")
+    elif RAW_CSV.exists():
+        df = pd.read_csv(RAW_CSV)
+        print(f"Loaded: {RAW_CSV}")
+    else:
+        sys.exit("❌ Neither students_clean.csv nor students.csv found in current folder.")
+
+    if not pd.api.types.is_numeric_dtype(df["pass_fail"]):
+        df["pass_fail"] = (
+            df["pass_fail"].astype(str).str.strip().str.lower().map({"pass": 1, "fail": 0})
+        )
+
+    df = df.dropna(subset=["pass_fail"]).copy()
+    df["pass_fail"] = df["pass_fail"].astype(int)
+
+    candidates = ["math", "science", "english", "hours_studied", "attendance", "participation"]
+    features = [c for c in candidates if c in df.columns]
+    if not features:
+        sys.exit("❌ No usable feature columns. Expected at least one of: " + ", ".join(candidates))
+
+    X = df[features].astype("float64")
+    y = df["pass_fail"].copy()
+
+    X = X.fillna(X.median(numeric_only=True))
+    return X, y, features
+
+
+def can_stratify(y: pd.Series, min_per_class: int = 2) -> bool:
+    unique_classes = sorted(y.unique().tolist())
+    if len(unique_classes) < 2:
+        print("⚠️ Only one class present in target. Classification metrics may be trivial.")
+        return False
     class_counts = y.value_counts()
-    if (class_counts < 2).any():
-        stratify_arg = None
+    if (class_counts < min_per_class).any():
         print("⚠️ Not enough samples per class to stratify; proceeding without stratify.")
-    else:
-        stratify_arg = y
-
-try:
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.25, random_state=42, stratify=stratify_arg
-    )
-except ValueError:
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.25, random_state=42
-    )
-    print("⚠️ Fallback split without stratify due to small dataset.")
-
-print(f"Train size: {len(X_train)}, Test size: {len(X_test)}")
-
-scaler = StandardScaler()
-X_train_s = scaler.fit_transform(X_train)
-X_test_s  = scaler.transform(X_test)
-
-train_n = len(X_train)
-safe_k = max(1, min(5, train_n))
-if safe_k % 2 == 0 and safe_k > 1:
-    safe_k -= 1
-print("Using k for k-NN:", safe_k)
-
-models = {
-    "Logistic Regression": LogisticRegression(max_iter=1000),
-    "Decision Tree": DecisionTreeClassifier(max_depth=5, random_state=42),
-    f"k-NN (k={safe_k})": KNeighborsClassifier(n_neighbors=safe_k),
-}
+        return False
+    return True
+
 
 def save_confmat(name: str, cm: np.ndarray) -> None:
     fig, ax = plt.subplots()
@@ -105,33 +94,203 @@ def save_confmat(name: str, cm: np.ndarray) -> None:
     plt.close()
     print(f"💾 Saved confusion matrix → {out}")
 
-results = []
 
-for name, model in models.items():
-    if name.startswith("Decision Tree"):
-        model.fit(X_train, y_train)
-        preds = model.predict(X_test)
+def evaluate_holdout(X: pd.DataFrame, y: pd.Series, features: list[str]) -> None:
+    OUTDIR.mkdir(exist_ok=True)
+    stratify_arg = y if can_stratify(y) else None
+
+    try:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.25, random_state=RANDOM_STATE, stratify=stratify_arg
+        )
+    except ValueError:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.25, random_state=RANDOM_STATE
+        )
+        print("⚠️ Fallback split without stratify due to small dataset.")
+
+    print(f"Train size: {len(X_train)}, Test size: {len(X_test)}")
+
+    scaler = StandardScaler()
+    X_train_s = scaler.fit_transform(X_train)
+    X_test_s  = scaler.transform(X_test)
+
+    train_n = len(X_train)
+    safe_k = max(1, min(5, train_n))
+    if safe_k % 2 == 0 and safe_k > 1:
+        safe_k -= 1
+    print("Using k for k-NN:", safe_k)
+
+    models = {
+        "Logistic Regression": LogisticRegression(max_iter=1000),
+        "Decision Tree": DecisionTreeClassifier(max_depth=5, random_state=RANDOM_STATE),
+        f"k-NN (k={safe_k})": KNeighborsClassifier(n_neighbors=safe_k),
+    }
+
+    results = []
+
+    for name, model in models.items():
+        if name.startswith("Decision Tree"):
+            model.fit(X_train, y_train)
+            preds = model.predict(X_test)
+        else:
+            model.fit(X_train_s, y_train)
+            preds = model.predict(X_test_s)
+
+        acc = accuracy_score(y_test, preds)
+        cm = confusion_matrix(y_test, preds, labels=[0, 1])
+        results.append((name, acc))
+
+        print(f"\n=== {name} ===")
+        print("Features:", features)
+        print("Accuracy:", round(acc, 4))
+        print("Confusion matrix (rows=true [0,1]; cols=pred [0,1]):\n", cm)
+        try:
+            print("Classification report:\n",
+                  classification_report(y_test, preds, target_names=["fail", "pass"]))
+        except Exception as e:
+            print(f"(classification_report skipped: {e})")
+
+        save_confmat(name, cm)
+
+    print("\n=== Model Comparison (Accuracy) ===")
+    for name, acc in sorted(results, key=lambda x: x[1], reverse=True):
+        print(f"{name:20s} : {acc:.4f}")
+
+
+# Cross-validation workers get the data and the per-fold scalers once, when
+# the pool starts, and keep each fold's scaled matrices for later tasks.
+_cv_data = {}
+
+
+def _init_cv_worker(X: np.ndarray, y: np.ndarray, folds: list, scalers: list) -> None:
+    _cv_data.update(X=X, y=y, folds=folds, scalers=scalers, cache={})
+
+
+def _fold_arrays(fold: int, scaled: bool) -> tuple:
+    key = (fold, scaled)
+    if key not in _cv_data["cache"]:
+        X, y = _cv_data["X"], _cv_data["y"]
+        train_idx, test_idx = _cv_data["folds"][fold]
+        X_train, X_test = X[train_idx], X[test_idx]
+        if scaled:
+            scaler = _cv_data["scalers"][fold]
+            X_train, X_test = scaler.transform(X_train), scaler.transform(X_test)
+        _cv_data["cache"][key] = (X_train, y[train_idx], X_test, y[test_idx])
+    return _cv_data["cache"][key]
+
+
+def _run_cv_task(name: str, value, fold: int) -> tuple:
+    # Wall-clock start/end (comparable across processes) and the CPU time
+    # this worker spent on the task.
+    estimator, fixed, param, _, scaled = CV_MODELS[name]
+    started, cpu_started = time.time(), time.process_time()
+    X_train, y_train, X_test, y_test = _fold_arrays(fold, scaled)
+    model = estimator(**fixed, **{param: value})
+    model.fit(X_train, y_train)
+    acc = accuracy_score(y_test, model.predict(X_test))
+    return acc, started, time.time(), time.process_time() - cpu_started
+
+
+def cross_validate(X: pd.DataFrame, y: pd.Series, n_folds: int = CV_FOLDS, workers: int | None = None) -> None:
+    X_values = X.to_numpy()
+    y_values = y.to_numpy()
+    if can_stratify(y, min_per_class=n_folds):
+        splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=RANDOM_STATE)
     else:
-        model.fit(X_train_s, y_train)
-        preds = model.predict(X_test_s)
+        splitter = KFold(n_splits=n_folds, shuffle=True, random_state=RANDOM_STATE)
+    folds = list(splitter.split(X_values, y_values))
+    # One scaler per fold, fitted on that fold's training rows only.
+    scalers = [StandardScaler().fit(X_values[train_idx]) for train_idx, _ in folds]
 
-    acc = accuracy_score(y_test, preds)
-    cm = confusion_matrix(y_test, preds, labels=[0, 1])
-    results.append((name, acc))
+    smallest_train = min(len(train_idx) for train_idx, _ in folds)
+    grids = {}
+    tasks = []
+    for name, (_, _, param, grid, _) in CV_MODELS.items():
+        if param == "n_neighbors":
+            grid = [k for k in grid if k <= smallest_train] or [1]
+        grids[name] = grid
+        tasks.extend((name, value, fold) for value in grid for fold in range(n_folds))
 
-    print(f"\n=== {name} ===")
-    print("Features:", features)
-    print("Accuracy:", round(acc, 4))
-    print("Confusion matrix (rows=true [0,1]; cols=pred [0,1]):\n", cm)
-    try:
-        print("Classification report:\n",
-              classification_report(y_test, preds, target_names=["fail", "pass"]))
-    except Exception as e:
-        print(f"(classification_report skipped: {e})")
+    print(f"Cross-validating {len(tasks)} fits ({n_folds} folds, {len(X_values)} rows)")
+    scores = {}
+    cpu = {name: 0.0 for name in CV_MODELS}
+    spans = {}
+    failures = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_cv_worker,
+                             initargs=(X_values, y_values, folds, scalers)) as executor:
+        futures = {executor.submit(_run_cv_task, *task): task for task in tasks}
+        for future in as_completed(futures):
+            name, value, fold = futures[future]
+            try:
+                acc, task_start, task_end, task_cpu = future.result()
+            except Exception as e:
+                failures.append((name, value, fold, e))
+                continue
+            scores.setdefault((name, value), []).append(acc)
+            cpu[name] += task_cpu
+            first, last = spans.get(name, (task_start, task_end))
+            spans[name] = (min(first, task_start), max(last, task_end))
+    wall = time.perf_counter() - started
+
+    for name, value, fold, e in sorted(failures, key=lambda failure: (failure[0], failure[2])):
+        param = CV_MODELS[name][2]
+        print(f"⚠️ {name} ({param}={value}) failed on fold {fold + 1}: {e}")
+
+    # Wall time is from a model's first task starting to its last finishing,
+    # so it overlaps with other models running on the same pool; CPU time
+    # adds up every task's fit and scoring.
+    best = []
+    for name, (_, _, param, _, _) in CV_MODELS.items():
+        model_wall = spans[name][1] - spans[name][0] if name in spans else 0.0
+        print(f"\n=== {name} (wall {model_wall:.2f}s, fit CPU {cpu[name]:.2f}s) ===")
+        rows = []
+        for value in grids[name]:
+            accs = scores.get((name, value), [])
+            if not accs:
+                print(f"  {param}={value!s:<6} : every fold failed")
+                continue
+            folds_note = f"  ({len(accs)}/{n_folds} folds)" if len(accs) < n_folds else ""
+            print(f"  {param}={value!s:<6} : {np.mean(accs):.4f} ± {np.std(accs):.4f}{folds_note}")
+            rows.append((value, np.mean(accs), np.std(accs)))
+        if rows:
+            value, mean, std = max(rows, key=lambda row: row[1])
+            best.append((f"{name} ({param}={value})", mean, std, model_wall, cpu[name]))
+
+    print(f"\n=== Model Comparison ({n_folds}-fold CV, best setting per model) ===")
+    for name, mean, std, model_wall, model_cpu in sorted(best, key=lambda x: x[1], reverse=True):
+        print(f"{name:36s} : {mean:.4f} ± {std:.4f}  (wall {model_wall:.2f}s, fit CPU {model_cpu:.2f}s)")
+    print(f"Total wall time: {wall:.2f}s")
+    if failures:
+        print(f"⚠️ {len(failures)} of {len(tasks)} fits failed; see above.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare pass/fail classifiers on the student data")
+    parser.add_argument("--cv", type=int, nargs="?", const=CV_FOLDS, default=None, metavar="FOLDS",
+                        help=f"k-fold cross-validation over a small hyperparameter grid instead of one split "
+                             f"(default folds: {CV_FOLDS})")
+    parser.add_argument("--workers", type=int, default=None, help="processes for --cv (default: one per CPU)")
+    args = parser.parse_args()
+
+    X, y, features = load_data()
+    if args.cv is not None:
+        if args.cv < 2:
+            parser.error("--cv needs at least 2 folds")
+        if args.cv > len(y):
+            parser.error(f"--cv {args.cv} is more folds than rows ({len(y)})")
+        # Stratified folds need every class in every fold.
+        class_counts = y.value_counts()
+        if len(class_counts) > 1 and args.cv > class_counts.min():
+            parser.error(f"--cv {args.cv} is more folds than the smallest class has rows "
+                         f"({class_counts.min()}); use at most {class_counts.min()}")
+        print("Features:", features)
+        cross_validate(X, y, args.cv, args.workers)
+    else:
+        evaluate_holdout(X, y, features)
+    print("\n✅ Done.")
 
-    save_confmat(name, cm)
 
-print("\n=== Model Comparison (Accuracy) ===")
-for name, acc in sorted(results, key=lambda x: x[1], reverse=True):
-    print(f"{name:20s} : {acc:.4f}")
-print("\n✅ Done.")
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,51 @@
 import sqlite3
 import csv
 import os
+import io
+import gzip
+import json
+import sys
+import atexit
+import argparse
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DB_FILE = 'school.db'
+CACHE_SIZE_KB = 16384
+BUSY_TIMEOUT_MS = 5000
+CACHED_STATEMENTS = 256
+IMPORT_BATCH_SIZE = 50000
+CONFLICT_MODES = ('report', 'ignore', 'upsert')
+EXPORT_CHUNK_SIZE = 10000
+PAGE_SIZE = 20
+SORT_COLUMNS = ('id', 'name', 'roll_number', 'grade')
+
+_connection = None
 
 def connect_db():
-    return sqlite3.connect('school.db')
+    # One tuned connection per process; `with connect_db() as conn:` only
+    # commits or rolls back, it does not close it.
+    global _connection
+    if _connection is None:
+        conn = sqlite3.connect(DB_FILE, cached_statements=CACHED_STATEMENTS)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        _connection = conn
+        atexit.register(close_db)
+    return _connection
+
+def close_db():
+    global _connection
+    if _connection is not None:
+        _connection.execute('PRAGMA optimize')
+        _connection.close()
+        _connection = None
 
 def create_table():
     with connect_db() as conn:
@@ -16,22 +58,94 @@ def create_table():
                 grade TEXT NOT NULL
             )
         ''')
+        # Each index also carries the rowid (id), so it serves ORDER BY <column>, id.
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_students_name ON students (name)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_students_grade ON students (grade)')
         conn.commit()
 
-def display_all_students():
-    with connect_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, name, roll_number, grade FROM students')
-        records = cursor.fetchall()
+def fetch_page(sort='id', after=None, before=None, limit=PAGE_SIZE):
+    # Keyset pagination: `after`/`before` is the sort key of the last/first row
+    # on the current page, so every page is an index seek instead of an OFFSET scan.
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"sort must be one of {SORT_COLUMNS}")
+    select = 'SELECT id, name, roll_number, grade FROM students'
+    key = after if after is not None else before
+    if key is None:
+        order = 'id' if sort == 'id' else f'{sort}, id'
+        return connect_db().execute(f'{select} ORDER BY {order} LIMIT ?', (limit,)).fetchall()
+
+    op, direction = ('>', '') if after is not None else ('<', ' DESC')
+    if sort == 'id':
+        query = f'{select} WHERE id {op} ? ORDER BY id{direction} LIMIT ?'
+        params = (key[0], limit)
+    else:
+        # SQLite only seeks on the first column of a row-value comparison, so
+        # split "(sort, id) > key" into two seeks: the rest of the current
+        # sort value, then the following values.
+        order = f'{sort}{direction}, id{direction}'
+        query = (f'SELECT * FROM ({select} WHERE {sort} = ? AND id {op} ? ORDER BY id{direction} LIMIT ?) '
+                 f'UNION ALL SELECT * FROM ({select} WHERE {sort} {op} ? ORDER BY {order} LIMIT ?) '
+                 f'ORDER BY {order} LIMIT ?')
+        params = (key[0], key[1], limit, key[0], limit, limit)
+    rows = connect_db().execute(query, params).fetchall()
+    return rows[::-1] if before is not None else rows
+
+def fetch_last_page(sort='id', limit=PAGE_SIZE):
+    order = 'id DESC' if sort == 'id' else f'{sort} DESC, id DESC'
+    query = f'SELECT id, name, roll_number, grade FROM students ORDER BY {order} LIMIT ?'
+    return connect_db().execute(query, (limit,)).fetchall()[::-1]
+
+def _page_key(row, sort):
+    return (row[0],) if sort == 'id' else (row[SORT_COLUMNS.index(sort)], row[0])
+
+def print_records(records, title):
+    print(f"\n{title}")
+    print(f"{'ID':<5}{'Name':<20}{'Roll Number':<15}{'Grade':<10}")
+    print('-'*50)
+    for row in records:
+        print(f"{row[0]:<5}{row[1]:<20}{row[2]:<15}{row[3]:<10}")
+    print()
+
+def display_all_students(page_size=PAGE_SIZE):
+    sort = 'id'
+    records = fetch_page(sort, limit=page_size)
+    if not records:
+        print("\nNo student records found.\n")
+        return
+    while True:
+        print_records(records, f"All Student Records (sorted by {sort}):")
+        choice = input("[n]ext, [p]revious, [f]irst, [l]ast, [s]ort, [q]uit: ").strip().lower()
+        if choice == 'n':
+            rows = fetch_page(sort, after=_page_key(records[-1], sort), limit=page_size)
+            if rows:
+                records = rows
+            else:
+                print("Already on the last page.")
+        elif choice == 'p':
+            rows = fetch_page(sort, before=_page_key(records[0], sort), limit=page_size)
+            if rows:
+                records = rows
+            else:
+                print("Already on the first page.")
+        elif choice == 'f':
+            records = fetch_page(sort, limit=page_size)
+        elif choice == 'l':
+            records = fetch_last_page(sort, limit=page_size)
+        elif choice == 's':
+            new_sort = input(f"Sort by ({'/'.join(SORT_COLUMNS)}): ").strip().lower()
+            if new_sort in SORT_COLUMNS:
+                sort = new_sort
+                records = fetch_page(sort, limit=page_size)
+            else:
+                print("Invalid sort column.")
+        elif choice == 'q':
+            print()
+            break
+        else:
+            print("Invalid choice.")
         if not records:
             print("\nNo student records found.\n")
-        else:
-            print("\nAll Student Records:")
-            print(f"{'ID':<5}{'Name':<20}{'Roll Number':<15}{'Grade':<10}")
-            print('-'*50)
-            for row in records:
-                print(f"{row[0]:<5}{row[1]:<20}{row[2]:<15}{row[3]:<10}")
-            print()
+            return
 
 def validate_name(name):
     return name.isalpha() and len(name) >= 2
@@ -114,20 +228,204 @@ def delete_student():
         conn.commit()
         print("Student record deleted successfully!\n")
 
-def save_to_csv():
-    filename = 'students.csv'
-    with connect_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, name, roll_number, grade FROM students')
-        records = cursor.fetchall()
-        if not records:
-            print("No records to save.\n")
-            return
-        with open(filename, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['ID', 'Name', 'Roll Number', 'Grade'])
+def _open_export(filename):
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'wt', newline='', encoding='utf-8')
+    if filename.endswith('.zst'):
+        if zstandard is None:
+            raise ValueError("zstd export requires the 'zstandard' package")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(filename, 'wb')),
+                                newline='', encoding='utf-8')
+    return open(filename, 'w', newline='', encoding='utf-8')
+
+def _write_chunks(outfile, chunks, as_jsonl):
+    if as_jsonl:
+        for records in chunks:
+            outfile.write(''.join(
+                json.dumps({'id': row[0], 'name': row[1], 'roll_number': row[2], 'grade': row[3]}) + '\n'
+                for row in records))
+    else:
+        writer = csv.writer(outfile)
+        writer.writerow(['ID', 'Name', 'Roll Number', 'Grade'])
+        for records in chunks:
             writer.writerows(records)
-        print(f"Records saved to {filename} in {os.getcwd()}\n")
+
+def export_students(filename='students.csv', grade=None):
+    # Format follows the file name: .csv or .jsonl, optionally with .gz or .zst.
+    # Rows are fetched in chunks, and no file is created when nothing matches.
+    base = filename[:-len('.gz')] if filename.endswith('.gz') else filename
+    base = base[:-len('.zst')] if base.endswith('.zst') else base
+    as_jsonl = base.endswith('.jsonl')
+    query = 'SELECT id, name, roll_number, grade FROM students'
+    params = ()
+    if grade:
+        query += ' WHERE grade = ?'
+        params = (grade.upper(),)
+
+    cursor = connect_db().cursor()
+    cursor.execute(query, params)
+    first = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+    if not first:
+        return 0
+
+    count = 0
+    def chunks():
+        nonlocal count
+        records = first
+        while records:
+            count += len(records)
+            yield records
+            records = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+
+    with _open_export(filename) as outfile:
+        _write_chunks(outfile, chunks(), as_jsonl)
+    return count
+
+def save_to_csv(filename='students.csv', grade=None):
+    try:
+        count = export_students(filename, grade)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}\n")
+        return
+    if not count:
+        print("No records to save.\n")
+        return
+    print(f"{count} records saved to {filename} in {os.getcwd()}\n")
+
+def save_records():
+    filename = input("Enter output file (.csv/.jsonl, optionally .gz/.zst) [students.csv]: ").strip() or 'students.csv'
+    grade = input("Only export grade (A-F, blank for all): ").strip().upper()
+    if grade and not validate_grade(grade):
+        print("Invalid grade. Export cancelled.\n")
+        return
+    save_to_csv(filename, grade or None)
+
+def _normalize_header(field):
+    return field.strip().lower().replace(' ', '_')
+
+def _existing_roll_numbers(cursor, roll_numbers):
+    # Stay under SQLite's default limit on bound parameters.
+    found = set()
+    roll_numbers = list(roll_numbers)
+    for start in range(0, len(roll_numbers), 900):
+        chunk = roll_numbers[start:start + 900]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'SELECT roll_number FROM students WHERE roll_number IN ({placeholders})', chunk)
+        found.update(row[0] for row in cursor.fetchall())
+    return found
+
+def _drop_secondary_indexes(conn):
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'students' AND sql IS NOT NULL"
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+def _insert_batch(cursor, batch, line_numbers, on_conflict, duplicates):
+    if on_conflict == 'ignore':
+        cursor.executemany('INSERT OR IGNORE INTO students (name, roll_number, grade) VALUES (?, ?, ?)', batch)
+        return cursor.rowcount
+    if on_conflict == 'upsert':
+        cursor.executemany(
+            'INSERT INTO students (name, roll_number, grade) VALUES (?, ?, ?) '
+            'ON CONFLICT(roll_number) DO UPDATE SET name = excluded.name, grade = excluded.grade', batch)
+        return cursor.rowcount
+
+    existing = _existing_roll_numbers(cursor, {row[1] for row in batch})
+    rows = []
+    for line_num, row in zip(line_numbers, batch):
+        if row[1] in existing:
+            duplicates.append((line_num, row[1]))
+            continue
+        existing.add(row[1])
+        rows.append(row)
+    cursor.executemany('INSERT INTO students (name, roll_number, grade) VALUES (?, ?, ?)', rows)
+    return len(rows)
+
+def import_from_csv(filename, on_conflict='report', defer_indexes=False, batch_size=IMPORT_BATCH_SIZE):
+    if on_conflict not in CONFLICT_MODES:
+        raise ValueError(f"on_conflict must be one of {CONFLICT_MODES}")
+    result = {'imported': 0, 'invalid': [], 'duplicates': []}
+    conn = connect_db()
+    cursor = conn.cursor()
+
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        header = [_normalize_header(field) for field in next(reader, [])]
+        missing = [field for field in ('name', 'roll_number', 'grade') if field not in header]
+        if missing:
+            raise ValueError(f"CSV header is missing column(s): {', '.join(missing)}")
+        name_index, roll_index, grade_index = (header.index(field) for field in ('name', 'roll_number', 'grade'))
+        width = max(name_index, roll_index, grade_index) + 1
+
+        index_sql = _drop_secondary_indexes(conn) if defer_indexes else []
+        try:
+            batch = []
+            line_numbers = []
+            for line_num, row in enumerate(reader, start=2):
+                if not row:
+                    continue
+                if len(row) < width:
+                    result['invalid'].append((line_num, 'missing fields'))
+                    continue
+                name = row[name_index].strip()
+                roll_number = row[roll_index].strip()
+                grade = row[grade_index].strip().upper()
+                if not validate_name(name):
+                    result['invalid'].append((line_num, f"invalid name '{name}'"))
+                elif not validate_roll_number(roll_number):
+                    result['invalid'].append((line_num, f"invalid roll number '{roll_number}'"))
+                elif not validate_grade(grade):
+                    result['invalid'].append((line_num, f"invalid grade '{grade}'"))
+                else:
+                    batch.append((name, roll_number, grade))
+                    line_numbers.append(line_num)
+                if len(batch) >= batch_size:
+                    with conn:
+                        result['imported'] += _insert_batch(cursor, batch, line_numbers, on_conflict, result['duplicates'])
+                    batch = []
+                    line_numbers = []
+            if batch:
+                with conn:
+                    result['imported'] += _insert_batch(cursor, batch, line_numbers, on_conflict, result['duplicates'])
+        finally:
+            with conn:
+                for sql in index_sql:
+                    conn.execute(sql)
+    return result
+
+def _print_problems(title, problems, limit=10):
+    if not problems:
+        return
+    print(f"{title}: {len(problems)}")
+    for line_num, detail in problems[:limit]:
+        print(f"  line {line_num}: {detail}")
+    if len(problems) > limit:
+        print(f"  ... {len(problems) - limit} more")
+
+def import_students(filename=None, on_conflict=None, defer_indexes=False):
+    print("\nImport Student Records from CSV:")
+    if filename is None:
+        filename = input("Enter CSV file path: ").strip().strip('"').strip("'")
+    if on_conflict is None:
+        on_conflict = input("On duplicate roll number - report, ignore or upsert? [report]: ").strip().lower() or 'report'
+        if on_conflict not in CONFLICT_MODES:
+            print("Invalid choice. Import cancelled.\n")
+            return
+    try:
+        result = import_from_csv(filename, on_conflict=on_conflict, defer_indexes=defer_indexes)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.\n")
+        return
+    except (ValueError, UnicodeDecodeError, sqlite3.DatabaseError) as e:
+        print(f"Error: {e}\n")
+        return
+    action = "Inserted or updated" if on_conflict == 'upsert' else "Imported"
+    print(f"{action} {result['imported']} student records.")
+    _print_problems("Invalid rows skipped", result['invalid'])
+    _print_problems("Duplicate roll numbers skipped", result['duplicates'])
+    print()
 
 def main_menu():
     while True:
@@ -139,9 +437,10 @@ def main_menu():
         print("2) Add new student record")
         print("3) Search and update student details")
         print("4) Delete student record by roll number")
-        print("5) Save table as .csv file")
-        print("6) Exit")
-        choice = input("Enter your choice (1-6): ").strip()
+        print("5) Save table as .csv/.jsonl file")
+        print("6) Import student records from .csv file")
+        print("7) Exit")
+        choice = input("Enter your choice (1-7): ").strip()
         if choice == '1':
             display_all_students()
             print("Task completed. Returning to main menu.\n")
@@ -155,14 +454,33 @@ def main_menu():
             delete_student()
             print("Task completed. Returning to main menu.\n")
         elif choice == '5':
-            save_to_csv()
+            save_records()
             print("Task completed. Returning to main menu.\n")
         elif choice == '6':
+            import_students()
+            print("Task completed. Returning to main menu.\n")
+        elif choice == '7':
             print("Thank you for using the School Report Card Manager. Goodbye!")
             break
         else:
-            print("Invalid choice. Please enter a number between 1 and 6.\n")
+            print("Invalid choice. Please enter a number between 1 and 7.\n")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="School Report Card Manager")
+    parser.add_argument('--import', dest='import_file', metavar='CSV', help="import students from CSV and exit")
+    parser.add_argument('--on-conflict', choices=CONFLICT_MODES, default='report',
+                        help="duplicate roll numbers: report and skip, ignore silently, or upsert")
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help="drop secondary indexes during the import and rebuild them afterwards")
+    parser.add_argument('--export', metavar='FILE',
+                        help="export students to FILE (.csv or .jsonl, optionally .gz/.zst) and exit")
+    parser.add_argument('--grade', help="only export students with this grade")
+    args = parser.parse_args()
     create_table()
+    if args.import_file:
+        import_students(args.import_file, args.on_conflict, args.defer_indexes)
+    if args.export:
+        save_to_csv(args.export, args.grade)
+    if args.import_file or args.export:
+        sys.exit(0)
     main_menu()
@@ -1,3 +1,16 @@
+import argparse
+import codecs
+import hashlib
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+BLOCK_SIZE = 1024 * 1024
+MIN_CHUNK_SIZE = 32 * 1024 * 1024
+CACHE_FILE = '.task1_cache.json'
+
 def analyze_text_file(filename):
     with open(filename, 'r', encoding='utf-8') as file:
         content = file.read()
@@ -19,6 +32,236 @@ def analyze_text_file(filename):
         'total_characters_no_whitespace': total_characters_no_whitespace
     }
 
+def _count_range(filename, start, end):
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+    counts = {
+        'newlines': 0,
+        'words': 0,
+        'characters': 0,
+        'characters_no_whitespace': 0,
+        'starts_in_word': False,
+        'ends_in_word': False,
+        'starts_with_lf': False,
+        'ends_with_cr': False,
+    }
+    seen_text = False
+
+    def feed(text):
+        nonlocal seen_text
+        if not text:
+            return
+        counts['newlines'] += text.count('\n')
+        counts['characters'] += len(text)
+        counts['characters_no_whitespace'] += len(text) - text.count(' ') - text.count('\n') - text.count('\t')
+        counts['words'] += len(text.split())
+        if not seen_text:
+            counts['starts_in_word'] = not text[0].isspace()
+            seen_text = True
+        elif counts['ends_in_word'] and not text[0].isspace():
+            counts['words'] -= 1
+        counts['ends_in_word'] = not text[-1].isspace()
+
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        remaining = end - start
+        first = True
+        while remaining > 0:
+            block = file.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            if first:
+                counts['starts_with_lf'] = block[:1] == b'\n'
+                first = False
+            counts['ends_with_cr'] = block[-1:] == b'\r'
+            feed(decoder.decode(block))
+        feed(decoder.decode(b'', final=True))
+    return counts
+
+
+def _merge_counts(parts):
+    total = None
+    for part in parts:
+        if total is None:
+            total = dict(part)
+            continue
+        total['newlines'] += part['newlines']
+        total['words'] += part['words']
+        total['characters'] += part['characters']
+        total['characters_no_whitespace'] += part['characters_no_whitespace']
+        # A '\r\n' split across two ranges was translated to two newlines.
+        if total['ends_with_cr'] and part['starts_with_lf']:
+            total['newlines'] -= 1
+            total['characters'] -= 1
+        # A word split across two ranges was counted once on each side.
+        if total['ends_in_word'] and part['starts_in_word']:
+            total['words'] -= 1
+        if part['characters']:
+            total['ends_in_word'] = part['ends_in_word']
+        total['ends_with_cr'] = part['ends_with_cr']
+    return total
+
+
+def _split_ranges(filename, size, workers):
+    chunk_size = max(MIN_CHUNK_SIZE, -(-size // workers))
+    boundaries = [0]
+    with open(filename, 'rb') as file:
+        for offset in range(chunk_size, size, chunk_size):
+            # Move the boundary back to the start of a UTF-8 character.
+            file.seek(offset)
+            lead = file.read(4)
+            shift = 0
+            while shift < len(lead) and (lead[shift] & 0xC0) == 0x80:
+                shift += 1
+            boundary = offset + shift
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def analyze_text_file_parallel(filename, workers=None):
+    size = os.path.getsize(filename)
+    workers = workers or os.cpu_count() or 1
+    ranges = _split_ranges(filename, size, workers)
+
+    if len(ranges) <= 1:
+        parts = [_count_range(filename, 0, size)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+            parts = list(executor.map(_count_range, [filename] * len(ranges),
+                                      [start for start, _ in ranges],
+                                      [end for _, end in ranges]))
+
+    return _counts_to_results(_merge_counts(parts))
+
+
+def _counts_to_results(counts):
+    return {
+        'total_lines': counts['newlines'] + 1,
+        'total_words': counts['words'],
+        'total_characters': counts['characters'],
+        'total_characters_no_whitespace': counts['characters_no_whitespace']
+    }
+
+
+def _file_digest(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _analyze_corpus_file(filename, size, cached_digest, use_hash):
+    digest = None
+    try:
+        digest = _file_digest(filename) if use_hash else None
+        if digest is not None and digest == cached_digest:
+            return None, digest, None
+        return _counts_to_results(_count_range(filename, 0, size)), digest, None
+    except (OSError, UnicodeDecodeError) as e:
+        return None, digest, str(e)
+
+
+def _load_cache(cache_file):
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_file, cache):
+    temp_file = cache_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as file:
+        json.dump(cache, file)
+    os.replace(temp_file, cache_file)
+
+
+def _walk_corpus(root, suffix):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith(suffix):
+                yield os.path.join(dirpath, name)
+
+
+def analyze_corpus(root, cache_file=CACHE_FILE, use_hash=False, workers=None, suffix='.txt'):
+    cache = _load_cache(cache_file) if cache_file else {}
+    files = {}
+    errors = {}
+    stale = []
+    seen = set()
+
+    for filename in _walk_corpus(root, suffix):
+        path = os.path.abspath(filename)
+        seen.add(path)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            errors[filename] = str(e)
+            continue
+        entry = cache.get(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns \
+                and (not use_hash or entry.get('sha256')):
+            files[filename] = entry['results']
+        else:
+            stale.append((filename, path, stat))
+
+    if stale:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outcomes = executor.map(_analyze_corpus_file,
+                                    [path for _, path, _ in stale],
+                                    [stat.st_size for _, _, stat in stale],
+                                    [cache.get(path, {}).get('sha256') for _, path, _ in stale],
+                                    [use_hash] * len(stale),
+                                    chunksize=max(1, len(stale) // (workers * 4)))
+            for (filename, path, stat), (results, digest, error) in zip(stale, outcomes):
+                if error is not None:
+                    errors[filename] = error
+                    cache.pop(path, None)
+                    continue
+                if results is None:
+                    # Content hash matched, only the size/mtime key changed.
+                    results = cache[path]['results']
+                files[filename] = results
+                cache[path] = {
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'sha256': digest,
+                    'results': results
+                }
+
+    if cache_file:
+        # Forget files that are gone: anything under this root that the walk
+        # did not find, and entries for other roots whose file was deleted.
+        prefix = os.path.join(os.path.abspath(root), '')
+        for path in list(cache):
+            if path not in seen and (path.startswith(prefix) or not os.path.exists(path)):
+                del cache[path]
+        _save_cache(cache_file, cache)
+
+    aggregate = {
+        'total_files': len(files),
+        'total_lines': 0,
+        'total_words': 0,
+        'total_characters': 0,
+        'total_characters_no_whitespace': 0
+    }
+    for results in files.values():
+        for key in results:
+            aggregate[key] += results[key]
+
+    return {
+        'files': dict(sorted(files.items())),
+        'aggregate': aggregate,
+        'errors': errors,
+        'analyzed': len(stale)
+    }
+
+
 def print_analysis_results(results, filename):
     if results is None:
         return
@@ -33,6 +276,29 @@ def print_analysis_results(results, filename):
     print("="*50)
 
 def main():
+    parser = argparse.ArgumentParser(description="Text File Analyzer")
+    parser.add_argument('--corpus', metavar='DIR', help="analyze every text file under DIR and print JSON")
+    parser.add_argument('--suffix', default='.txt', help="file suffix to include in corpus mode (default: .txt)")
+    parser.add_argument('--cache', default=CACHE_FILE, help=f"per-file result cache (default: {CACHE_FILE})")
+    parser.add_argument('--no-cache', action='store_true', help="ignore and do not write the result cache")
+    parser.add_argument('--hash', action='store_true', help="also key the cache on a SHA-256 of the content")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    if args.corpus:
+        if not os.path.isdir(args.corpus):
+            sys.exit(f"Error: Directory '{args.corpus}' not found.")
+        report = analyze_corpus(args.corpus, cache_file=None if args.no_cache else args.cache,
+                                use_hash=args.hash, workers=args.workers, suffix=args.suffix)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        return
+
     print("Text File Analyzer")
     print("Enter the path to the .txt file you want to analyze:")
     
@@ -45,10 +311,13 @@ def main():
             filename = filename[1:-1]
         
         try:
-            results = analyze_text_file(filename)
+            results = analyze_text_file_parallel(filename, workers=args.workers)
             print_analysis_results(results, filename)
             break
         except FileNotFoundError:
             print(f"Error: File '{filename}' not found. Please try again.")
         except Exception as e:
-            print(f"Error reading file: {e}. Please try again.")
\ No newline at end of file
+            print(f"Error reading file: {e}. Please try again.")
+
+if __name__ == "__main__":
+    main()
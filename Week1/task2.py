@@ -1,6 +1,15 @@
+import argparse
 import csv
+import heapq
+import math
 import os
-from typing import List, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 def read_csv_file(filename: str = "students.csv") -> List[Dict]:
     students = []
@@ -90,6 +99,225 @@ def process_student_row(row: Dict[str, str], row_num: int) -> Optional[Dict]:
         return None
 
 
+
+def _is_mark_column(key: str) -> bool:
+    return key.lower().endswith('_marks') or key.lower().endswith('_mark')
+
+
+def _subject_name(key: str) -> str:
+    return key.replace('_marks', '').replace('_mark', '').replace('_', ' ').title()
+
+
+def _parse_mark_column(values: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    empty = np.char.str_len(np.char.strip(values)) == 0
+    filled = np.where(empty, '0', values)
+    try:
+        return filled.astype(np.float64), np.zeros(len(values), dtype=bool)
+    except ValueError:
+        pass
+
+    # Only columns that actually contain bad cells pay for the per-cell parse.
+    parsed = np.zeros(len(values), dtype=np.float64)
+    invalid = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(filled.tolist()):
+        try:
+            parsed[i] = float(value)
+        except ValueError:
+            invalid[i] = True
+    return parsed, invalid
+
+
+def _malformed_row_error(row_num: int, header: List[str], row: List[str]) -> Dict:
+    return {'row': row_num, 'field': None, 'value': None, 'issue': 'malformed',
+            'message': f"Row {row_num}: Expected {len(header)} fields, got {len(row)}"}
+
+
+def _select_uniform_rows(rows: List[List[str]], id_index: int, name_index: int,
+                         mark_indexes: List[int], errors: List[Dict]) -> Tuple:
+    columns = list(zip(*rows))
+    student_ids = np.char.strip(np.array(columns[id_index], dtype=str))
+    names = np.char.strip(np.array(columns[name_index], dtype=str))
+    missing = (np.char.str_len(student_ids) == 0) | (np.char.str_len(names) == 0)
+    keep = np.flatnonzero(~missing)
+    for i in np.flatnonzero(missing).tolist():
+        errors.append({'row': i + 2, 'field': None, 'value': None, 'issue': 'missing_id',
+                       'message': f"Row {i + 2}: Missing Student_ID or Name"})
+    mark_values = [np.array(columns[index], dtype=str)[keep] for index in mark_indexes]
+    return (keep + 2).tolist(), student_ids[keep].tolist(), names[keep].tolist(), mark_values
+
+
+def _select_ragged_rows(rows: List[List[str]], header: List[str], id_index: Optional[int],
+                        name_index: Optional[int], mark_indexes: List[int], errors: List[Dict]) -> Tuple:
+    id_width = max([i + 1 for i in (id_index, name_index) if i is not None], default=0)
+    mark_width = max([i + 1 for i in mark_indexes], default=0)
+    row_numbers = []
+    student_ids = []
+    names = []
+    mark_values = [[] for _ in mark_indexes]
+
+    for row_num, row in enumerate(rows, start=2):
+        # Checks run in the same order as process_student_row, so a row is
+        # reported for the same reason on both paths.
+        if len(row) < id_width:
+            errors.append(_malformed_row_error(row_num, header, row))
+            continue
+        student_id = row[id_index].strip() if id_index is not None else ''
+        name = row[name_index].strip() if name_index is not None else ''
+        if not student_id or not name:
+            errors.append({'row': row_num, 'field': None, 'value': None, 'issue': 'missing_id',
+                           'message': f"Row {row_num}: Missing Student_ID or Name"})
+            continue
+        if len(row) > len(header) or len(row) < mark_width:
+            errors.append(_malformed_row_error(row_num, header, row))
+            continue
+        if not mark_indexes:
+            errors.append({'row': row_num, 'field': None, 'value': None, 'issue': 'no_marks',
+                           'message': f"Row {row_num}: No valid marks found"})
+            continue
+        row_numbers.append(row_num)
+        student_ids.append(student_id)
+        names.append(name)
+        for values, index in zip(mark_values, mark_indexes):
+            values.append(row[index])
+
+    return row_numbers, student_ids, names, [np.array(values, dtype=str) for values in mark_values]
+
+
+def read_csv_columnar(filename: str = "students.csv") -> Tuple[Optional[Dict], List[Dict]]:
+    if np is None:
+        raise ImportError("read_csv_columnar requires numpy")
+    errors = []
+
+    with open(filename, 'r', newline='', encoding='utf-8') as file:
+        csv_reader = csv.reader(file)
+        header = next(csv_reader, None)
+        if header is None:
+            return None, errors
+
+        # Same key resolution as csv.DictReader: first occurrence fixes the
+        # order, the last occurrence supplies the value.
+        positions = {}
+        for index, key in enumerate(header):
+            positions[key] = index
+        id_index = positions.get('Student_ID')
+        name_index = positions.get('Name')
+        mark_keys = [key for key in positions if _is_mark_column(key)]
+        mark_indexes = [positions[key] for key in mark_keys]
+        subject_names = [_subject_name(key) for key in mark_keys]
+
+        rows = [row for row in csv_reader if row]
+
+    # DictReader skips blank lines without counting them, so row numbers
+    # follow the non-blank rows.
+    if id_index is not None and name_index is not None and mark_indexes \
+            and set(map(len, rows)) <= {len(header)}:
+        row_numbers, student_ids, names, mark_values = _select_uniform_rows(
+            rows, id_index, name_index, mark_indexes, errors)
+    else:
+        row_numbers, student_ids, names, mark_values = _select_ragged_rows(
+            rows, header, id_index, name_index, mark_indexes, errors)
+
+    if not row_numbers:
+        errors.sort(key=lambda error: error['row'])
+        return None, errors
+
+    marks = np.empty((len(row_numbers), len(mark_indexes)), dtype=np.float64)
+    cell_errors = []
+    for column, (values, subject) in enumerate(zip(mark_values, subject_names)):
+        parsed, invalid = _parse_mark_column(values)
+        out_of_range = ~invalid & ((parsed < 0) | (parsed > 100))
+        for i in np.flatnonzero(invalid | out_of_range).tolist():
+            if invalid[i]:
+                issue = 'invalid'
+                message = f"Row {row_numbers[i]}, {subject}: Invalid mark '{values[i]}', setting to 0"
+            else:
+                issue = 'out_of_range'
+                message = f"Row {row_numbers[i]}, {subject}: Mark {float(parsed[i])} is out of range (0-100)"
+            cell_errors.append({'row': row_numbers[i], 'field': subject,
+                                'value': str(values[i]), 'issue': issue, 'message': message})
+        parsed[invalid | out_of_range] = 0.0
+        marks[:, column] = parsed
+
+    # Add columns left to right so totals match sum() over each row exactly.
+    totals = np.zeros(len(row_numbers), dtype=np.float64)
+    for column in range(marks.shape[1]):
+        totals += marks[:, column]
+
+    # Stable sorts keep the column order within a row.
+    cell_errors.sort(key=lambda error: error['row'])
+    errors.extend(cell_errors)
+    errors.sort(key=lambda error: error['row'])
+
+    columns = {
+        'row_numbers': np.array(row_numbers),
+        'student_ids': student_ids,
+        'names': names,
+        'subject_names': subject_names,
+        'marks': marks,
+        'total_marks': totals,
+        'average_marks': totals / marks.shape[1],
+    }
+    return columns, errors
+
+
+def columns_to_students(columns: Optional[Dict]) -> List[Dict]:
+    if not columns:
+        return []
+    num_subjects = len(columns['subject_names'])
+    return [
+        {
+            'student_id': student_id,
+            'name': name,
+            'marks': marks,
+            'subject_names': list(columns['subject_names']),
+            'total_marks': total,
+            'average_marks': round(average, 2),
+            'num_subjects': num_subjects
+        }
+        for student_id, name, marks, total, average in zip(
+            columns['student_ids'], columns['names'], columns['marks'].tolist(),
+            columns['total_marks'].tolist(), columns['average_marks'].tolist())
+    ]
+
+
+def print_error_report(errors: List[Dict], limit: int = 10) -> None:
+    if not errors:
+        return
+    counts = {}
+    for error in errors:
+        counts[error['issue']] = counts.get(error['issue'], 0) + 1
+    summary = ', '.join(f"{issue}: {count}" for issue, count in counts.items())
+    print(f"Warning: {len(errors)} problems found ({summary})")
+    for error in errors[:limit]:
+        print(f"  {error['message']}")
+    if len(errors) > limit:
+        print(f"  ... {len(errors) - limit} more")
+
+
+def read_csv_file_fast(filename: str = "students.csv") -> Tuple[List[Dict], List[Dict]]:
+    if np is None:
+        return read_csv_file(filename), []
+
+    try:
+        columns, errors = read_csv_columnar(filename)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found!")
+        return [], []
+    except PermissionError:
+        print(f"Error: Permission denied to read '{filename}'")
+        return [], []
+    except UnicodeDecodeError:
+        print(f"Error: Unable to decode file '{filename}'. Please check file encoding.")
+        return [], []
+    except Exception as e:
+        print(f"Unexpected error reading file: {e}")
+        return [], []
+
+    students = columns_to_students(columns)
+    print(f"Successfully read {len(students)} student records from '{filename}'")
+    return students, errors
+
+
 def calculate_total_and_average(students: List[Dict]) -> None:
     if not students:
         print("No student data available for analysis.")
@@ -144,6 +372,127 @@ def display_class_statistics(students: List[Dict]) -> None:
     print(f"Lowest Average: {min(averages)}%")
 
 
+def iter_students(filename: str = "students.csv") -> Iterator[Dict]:
+    with open(filename, 'r', newline='', encoding='utf-8') as file:
+        for row_num, row in enumerate(csv.DictReader(file), start=2):
+            try:
+                student = process_student_row(row, row_num)
+            except Exception as e:
+                print(f"Warning: Error processing row {row_num}: {e}")
+                continue
+            if student:
+                yield student
+
+
+class StudentAggregator:
+    """Single-pass class statistics and top-N scorers over a stream of students."""
+
+    def __init__(self, top_n: int = 1):
+        self.top_n = top_n
+        self.count = 0
+        self.sum_average = 0.0
+        self.sum_total = 0.0
+        self.mean_average = 0.0
+        self.m2_average = 0.0
+        self.min_average = None
+        self.max_average = None
+        # Min-heap of (average, -position, student); ties keep the earlier student.
+        self._top = []
+
+    def add(self, student: Dict) -> None:
+        average = student['average_marks']
+        self.count += 1
+        self.sum_average += average
+        self.sum_total += student['total_marks']
+        delta = average - self.mean_average
+        self.mean_average += delta / self.count
+        self.m2_average += delta * (average - self.mean_average)
+        if self.min_average is None or average < self.min_average:
+            self.min_average = average
+        if self.max_average is None or average > self.max_average:
+            self.max_average = average
+        self._push((average, -self.count, student))
+
+    def update(self, students: Iterable[Dict]) -> "StudentAggregator":
+        for student in students:
+            self.add(student)
+        return self
+
+    def merge(self, other: "StudentAggregator") -> "StudentAggregator":
+        """Fold in an aggregate of students that come after this one's."""
+        if other.count == 0:
+            return self
+        offset = self.count
+        count = self.count + other.count
+        delta = other.mean_average - self.mean_average
+        self.mean_average += delta * other.count / count
+        self.m2_average += other.m2_average + delta * delta * self.count * other.count / count
+        self.count = count
+        self.sum_average += other.sum_average
+        self.sum_total += other.sum_total
+        if self.min_average is None or other.min_average < self.min_average:
+            self.min_average = other.min_average
+        if self.max_average is None or other.max_average > self.max_average:
+            self.max_average = other.max_average
+        for average, position, student in other._top:
+            self._push((average, position - offset, student))
+        return self
+
+    def _push(self, entry: Tuple) -> None:
+        if self.top_n <= 0:
+            return
+        if len(self._top) < self.top_n:
+            heapq.heappush(self._top, entry)
+        elif entry[:2] > self._top[0][:2]:
+            heapq.heapreplace(self._top, entry)
+
+    def top(self) -> List[Dict]:
+        return [student for _, _, student in sorted(self._top, key=lambda entry: entry[:2], reverse=True)]
+
+    def summary(self) -> Optional[Dict]:
+        if self.count == 0:
+            return None
+        return {
+            'total_students': self.count,
+            'class_average': round(self.sum_average / self.count, 2),
+            'average_total_marks': round(self.sum_total / self.count, 2),
+            'stdev_average': round(math.sqrt(self.m2_average / self.count), 2),
+            'highest_average': self.max_average,
+            'lowest_average': self.min_average,
+        }
+
+
+def summarize_file(filename: str, top_n: int = 1) -> StudentAggregator:
+    return StudentAggregator(top_n).update(iter_students(filename))
+
+
+def summarize_files(filenames: List[str], top_n: int = 1, workers: Optional[int] = None) -> StudentAggregator:
+    aggregate = StudentAggregator(top_n)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(summarize_file, filenames, [top_n] * len(filenames)):
+            aggregate.merge(partial)
+    return aggregate
+
+
+def display_aggregate_statistics(aggregate: StudentAggregator) -> None:
+    summary = aggregate.summary()
+    if summary is None:
+        print("No student data available for class statistics.")
+        return
+
+    print(f"\n📊 CLASS STATISTICS 📊")
+    print(f"Total Students: {summary['total_students']}")
+    print(f"Class Average: {summary['class_average']}%")
+    print(f"Average Total Marks: {summary['average_total_marks']}")
+    print(f"Standard Deviation: {summary['stdev_average']}")
+    print(f"Highest Average: {summary['highest_average']}%")
+    print(f"Lowest Average: {summary['lowest_average']}%")
+
+    print(f"\n🏆 TOP {len(aggregate.top())} SCORERS 🏆")
+    for rank, student in enumerate(aggregate.top(), start=1):
+        print(f"{rank}. {student['name']} ({student['student_id']}) - {student['average_marks']}%")
+
+
 def export_results(students: List[Dict], top_scorer: Optional[Dict], output_filename: str = "student_analysis.txt") -> None:
     try:
         with open(output_filename, 'w', encoding='utf-8') as file:
@@ -169,10 +518,30 @@ def export_results(students: List[Dict], top_scorer: Optional[Dict], output_file
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Student CSV reader and analyzer")
+    parser.add_argument('files', nargs='*', default=['students.csv'], help="CSV files (one per class shard)")
+    parser.add_argument('--stream', action='store_true', help="summarize in one pass without loading every student")
+    parser.add_argument('--top', type=int, default=1, help="number of top scorers to report in --stream mode")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for sharded files")
+    args = parser.parse_args()
+    if args.top < 1:
+        parser.error("--top must be at least 1")
+    if len(args.files) > 1 and not args.stream:
+        parser.error("several files can only be summarized together with --stream")
+
     print("🎓 STUDENT CSV READER AND ANALYZER 🎓")
     print("=" * 50)
+
+    if args.stream:
+        missing = [filename for filename in args.files if not os.path.exists(filename)]
+        if missing:
+            print(f"Error: File '{missing[0]}' not found!")
+            return
+        display_aggregate_statistics(summarize_files(args.files, args.top, args.workers))
+        return
     
-    students = read_csv_file('students.csv')
+    students, errors = read_csv_file_fast(args.files[0])
+    print_error_report(errors)
     
     if students:
         calculate_total_and_average(students)
@@ -187,3 +556,6 @@ def main():
     else:
         print("❌ Failed to read CSV file. Please check the file and try again.")
 
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,134 @@
+import argparse
 import csv
+import io
+import json
+import math
+import sys
 
-student_id = input("Enter student ID: ")
-student_name = input("Enter student name: ")
-marks = []
-for i in range(1, 4):
-    mark = input(f"Enter marks for subject {i}: ")
-    marks.append(mark)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
-row = [student_id, student_name] + marks
+BATCH_SIZE = 10000
+NUM_SUBJECTS = 3
 
-with open('students.csv', 'a', newline='') as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(row)
 
-print("Data written successfully to students.csv.")
+def append_rows(rows, filename='students.csv'):
+    # Format the whole batch first so it reaches the file in a single write
+    # while the lock is held; other writers never see a partial batch.
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    data = buffer.getvalue()
+    with open(filename, 'a', newline='') as csvfile:
+        if fcntl is not None:
+            fcntl.flock(csvfile.fileno(), fcntl.LOCK_EX)
+        try:
+            csvfile.write(data)
+            csvfile.flush()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(csvfile.fileno(), fcntl.LOCK_UN)
+
+
+def validate_record(record):
+    if len(record) != NUM_SUBJECTS + 2:
+        return f"expected {NUM_SUBJECTS + 2} fields, got {len(record)}"
+    student_id, student_name = record[0].strip(), record[1].strip()
+    if not student_id or not student_name:
+        return "missing student ID or name"
+    for mark in record[2:]:
+        try:
+            value = float(mark)
+        except ValueError:
+            return f"invalid mark '{mark}'"
+        if not math.isfinite(value):
+            return f"invalid mark '{mark}'"
+        if value < 0 or value > 100:
+            return f"mark {mark} is out of range (0-100)"
+    return None
+
+
+def read_csv_records(stream):
+    for line_num, record in enumerate(csv.reader(stream), start=1):
+        if not record:
+            continue
+        if line_num == 1 and record[0].strip().lower() == 'student_id':
+            continue
+        yield line_num, record
+
+
+def read_jsonl_records(stream):
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        # Parse and schema problems are yielded as exceptions so the caller
+        # can report them per line.
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_num, ValueError(f"invalid JSON ({e})")
+            continue
+        if not isinstance(data, dict):
+            yield line_num, ValueError("expected a JSON object")
+            continue
+        marks = data.get('marks', [])
+        if not isinstance(marks, list):
+            yield line_num, ValueError("'marks' must be a list")
+            continue
+        yield line_num, [str(data.get('student_id', '')), str(data.get('name', ''))] + [str(mark) for mark in marks]
+
+
+def bulk_append(records, filename='students.csv', batch_size=BATCH_SIZE):
+    written = 0
+    rejected = 0
+    batch = []
+    for line_num, record in records:
+        error = str(record) if isinstance(record, Exception) else validate_record(record)
+        if error:
+            rejected += 1
+            print(f"Line {line_num}: {error}, skipped", file=sys.stderr)
+            continue
+        batch.append([field.strip() for field in record])
+        if len(batch) >= batch_size:
+            append_rows(batch, filename)
+            written += len(batch)
+            batch = []
+    if batch:
+        append_rows(batch, filename)
+        written += len(batch)
+    return written, rejected
+
+
+def interactive_append(filename='students.csv'):
+    student_id = input("Enter student ID: ")
+    student_name = input("Enter student name: ")
+    marks = []
+    for i in range(1, NUM_SUBJECTS + 1):
+        mark = input(f"Enter marks for subject {i}: ")
+        marks.append(mark)
+
+    row = [student_id, student_name] + marks
+    append_rows([row], filename)
+
+    print(f"Data written successfully to {filename}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append student records to a CSV file")
+    parser.add_argument('--bulk', choices=['csv', 'jsonl'], help="read many records from stdin in this format")
+    parser.add_argument('--output', default='students.csv', help="CSV file to append to (default: students.csv)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help=f"rows per locked write (default: {BATCH_SIZE})")
+    args = parser.parse_args()
+
+    if not args.bulk:
+        interactive_append(args.output)
+        return
+
+    reader = read_csv_records if args.bulk == 'csv' else read_jsonl_records
+    written, rejected = bulk_append(reader(sys.stdin), args.output, args.batch_size)
+    print(f"Data written successfully to {args.output}: {written} rows appended, {rejected} rejected.")
+
+
+if __name__ == "__main__":
+    main()